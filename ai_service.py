@@ -3,20 +3,178 @@ AI service for generating meeting agenda summaries using OpenAI GPT
 """
 
 import openai
+import re
 import json
+import time
+import random
+import asyncio
 import logging
 from typing import Dict, List, Optional
 import os
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from summary_cache import SummaryCache, get_default_summary_cache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+
+# Bump whenever the prompts change so cached summaries are regenerated
+PROMPT_VERSION = '3'
+
+API_ERROR_PREFIX = "Unable to generate summary due to API error"
+
+# Limits for the async batch path (generate_summaries_async)
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '4'))
+AI_REQUESTS_PER_MINUTE = float(os.getenv('AI_REQUESTS_PER_MINUTE', '500'))
+AI_TOKENS_PER_MINUTE = float(os.getenv('AI_TOKENS_PER_MINUTE', '60000'))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '5'))
+
+# Long agendas are summarized in chunks of about this many characters, then reduced
+AI_CHUNK_CHARS = int(os.getenv('AI_CHUNK_CHARS', '4000'))
+# Maximum characters of partial summaries fed into a single reduce request
+AI_REDUCE_CHARS = int(os.getenv('AI_REDUCE_CHARS', '12000'))
+
+# Lines that start a new agenda item: "1.", "4)", "B.", "IV.", "Item 7"
+AGENDA_ITEM_PATTERN = re.compile(r'^\s*(?:\d{1,2}(?:\.\d+)*[.)]|[A-Z][.)]|[IVXL]+\.|item\s+\d+\b)', re.IGNORECASE)
+
+def _is_section_start(line: str) -> bool:
+    """Whether a line starts a new agenda item or is an ALL-CAPS heading"""
+    stripped = line.strip()
+    return bool(AGENDA_ITEM_PATTERN.match(line)) or (len(stripped) >= 4 and stripped.isupper())
+
+def split_agenda_sections(content: str) -> List[str]:
+    """Split agenda text into sections, each starting at an agenda item boundary"""
+    sections = []
+    current = []
+    
+    for line in content.splitlines():
+        if _is_section_start(line) and current:
+            sections.append('\n'.join(current))
+            current = []
+        current.append(line)
+    
+    if current:
+        sections.append('\n'.join(current))
+    
+    return [section for section in sections if section.strip()]
+
+def chunk_agenda(content: str, max_chars: int = AI_CHUNK_CHARS) -> List[str]:
+    """
+    Pack agenda sections into chunks of at most max_chars characters
+    
+    Sections are kept whole where possible; a section longer than max_chars is
+    split on line boundaries, and a single overlong line is split hard.
+    """
+    pieces = []
+    for section in split_agenda_sections(content):
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        for line in section.splitlines():
+            while len(line) > max_chars:
+                pieces.append(line[:max_chars])
+                line = line[max_chars:]
+            pieces.append(line)
+    
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current.strip():
+        chunks.append(current)
+    
+    return chunks
+
+class AsyncRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget for async OpenAI calls
+    
+    Both budgets refill continuously. After a 429 the usable share of the
+    budget is halved, then recovers a little with every successful call.
+    """
+    
+    def __init__(self, requests_per_minute: float = AI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = AI_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.scale = 1.0
+        
+        # Allow bursts of up to ten seconds' worth of budget
+        self.request_capacity = max(1.0, requests_per_minute / 6)
+        self.token_capacity = max(1.0, tokens_per_minute / 6)
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.requests_per_minute * self.scale / 60)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.tokens_per_minute * self.scale / 60)
+    
+    async def acquire(self, tokens: int):
+        """Wait until one request and the estimated tokens fit in the budget"""
+        # A single oversized request must still be able to go through eventually
+        tokens = min(tokens, self.token_capacity)
+        
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                
+                request_wait = (1 - self.requests) * 60 / (self.requests_per_minute * self.scale)
+                token_wait = (tokens - self.tokens) * 60 / (self.tokens_per_minute * self.scale)
+                await asyncio.sleep(max(request_wait, token_wait, 0.01))
+    
+    def refund(self, tokens: int):
+        """Return tokens that were estimated but not actually used"""
+        if tokens > 0:
+            self.tokens = min(self.token_capacity, self.tokens + tokens)
+    
+    def penalize(self):
+        """Slow down after the provider rejected a request with 429"""
+        self.scale = max(0.1, self.scale * 0.5)
+    
+    def reward(self):
+        """Recover toward the configured budget after a successful request"""
+        self.scale = min(1.0, self.scale + 0.05)
+
+def estimate_tokens(request: Dict) -> int:
+    """Rough token count for a chat request: ~4 characters per prompt token plus the completion cap"""
+    prompt_chars = sum(len(message['content']) for message in request['messages'])
+    return prompt_chars // 4 + request.get('max_tokens', 0)
+
 class AIService:
     """Service for generating AI-powered summaries of meeting agendas"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the AI service with OpenAI API key"""
+    def __init__(self, api_key: Optional[str] = None, single_call: Optional[bool] = None,
+                 cache: Optional[SummaryCache] = None):
+        """
+        Initialize the AI service with OpenAI API key
+        
+        Args:
+            api_key: OpenAI API key, defaults to OPENAI_API_KEY
+            single_call: Request summary and highlights in one structured call
+                (defaults to AI_SINGLE_CALL, on unless set to 'false')
+            cache: Summary cache, defaults to the process-wide SUMMARY_CACHE_URL cache
+        """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.model = DEFAULT_MODEL
+        if single_call is None:
+            single_call = os.getenv('AI_SINGLE_CALL', 'true').lower() == 'true'
+        self.single_call = single_call
+        self.cache = cache if cache is not None else get_default_summary_cache()
         if self.api_key:
             try:
                 self.client = openai.OpenAI(api_key=self.api_key)
@@ -51,21 +209,313 @@ class AIService:
                 'highlights': json.dumps([])
             }
         
+        cache_key = make_cache_key(agenda_content, meeting_title, meeting_date, self.model, PROMPT_VERSION)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached
+        
         try:
-            # Generate detailed summary
-            summary = self._generate_detailed_summary(agenda_content, meeting_title, meeting_date)
-            
-            # Generate key highlights
-            highlights = self._generate_highlights(agenda_content, meeting_title, meeting_date)
+            result = self._generate_with_api(agenda_content, meeting_title, meeting_date)
+        except Exception as e:
+            logger.error(f"Error generating AI summary: {e}")
+            return self._generate_fallback_summary(agenda_content, meeting_title, meeting_date)
+        
+        if result is None:
+            return self._incomplete_summary(agenda_content, meeting_title, meeting_date)
+        self._store_in_cache(cache_key, result)
+        return result
+    
+    def _generate_with_api(self, agenda_content: str, meeting_title: str, meeting_date: str) -> Optional[Dict[str, str]]:
+        """
+        Generate a summary with OpenAI
+        
+        Agendas longer than one chunk are summarized with map-reduce whatever
+        the request mode, and None is returned if any chunk fails. Shorter
+        agendas use the structured call first when single_call is enabled.
+        """
+        chunks = chunk_agenda(agenda_content)
+        if len(chunks) > 1:
+            return self._generate_map_reduce(chunks, meeting_title, meeting_date)
+        
+        if self.single_call:
+            combined = self._generate_combined(agenda_content, meeting_title, meeting_date)
+            if combined:
+                return {
+                    'summary': combined['summary'],
+                    'highlights': json.dumps(combined['highlights'])
+                }
+            logger.warning("Structured summary request failed, falling back to separate requests")
+        
+        return self._generate_separately(agenda_content, meeting_title, meeting_date)
+    
+    def _generate_separately(self, agenda_content: str, meeting_title: str, meeting_date: str) -> Dict[str, str]:
+        """Generate the summary and highlights with two separate requests"""
+        # Generate detailed summary
+        summary = self._generate_detailed_summary(agenda_content, meeting_title, meeting_date)
+        
+        # Generate key highlights
+        highlights = self._generate_highlights(agenda_content, meeting_title, meeting_date)
+        
+        return {
+            'summary': summary,
+            'highlights': json.dumps(highlights)
+        }
+    
+    def _generate_map_reduce(self, chunks: List[str], title: str, date: str) -> Optional[Dict[str, str]]:
+        """Summarize chunks in parallel, then reduce the partial summaries into one"""
+        with ThreadPoolExecutor(max_workers=min(len(chunks), AI_MAX_CONCURRENCY)) as executor:
+            partials = list(executor.map(lambda chunk: self._summarize_chunk(chunk, title, date), chunks))
+        
+        # A summary missing sections must not pass for the whole agenda
+        if not all(partials):
+            logger.warning(f"{partials.count(None)} of {len(chunks)} agenda chunks could not be summarized")
+            return None
+        
+        # Reduce in groups until everything fits into one request
+        while len(partials) > 1:
+            groups = self._reduce_groups(partials)
+            if len(groups) == 1:
+                return self._finish_reduce(self._request_structured(self._reduce_request(partials, title, date)), partials)
+            partials = [
+                self._request_structured(self._reduce_request(group, title, date)) or self._join_partials(group)
+                for group in groups
+            ]
+        
+        return self._finish_reduce(partials[0], partials)
+    
+    def _summarize_chunk(self, chunk: str, title: str, date: str) -> Optional[Dict]:
+        """Summarize one chunk, reusing the cached result if the chunk is unchanged"""
+        cache_key = make_cache_key(chunk, title, date, self.model, f"{PROMPT_VERSION}-chunk")
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached
+        
+        result = self._request_structured(self._chunk_request(chunk, title, date))
+        if result and self.cache:
+            self.cache.set(cache_key, result)
+        return result
+    
+    def _reduce_groups(self, partials: List[Dict]) -> List[List[Dict]]:
+        """Group partial summaries so each group fits within AI_REDUCE_CHARS"""
+        groups = []
+        current = []
+        size = 0
+        for partial in partials:
+            length = len(self._format_partial(partial))
+            if current and size + length > AI_REDUCE_CHARS:
+                groups.append(current)
+                current = []
+                size = 0
+            current.append(partial)
+            size += length
+        if current:
+            groups.append(current)
+        
+        # Always make progress, even if every partial is oversized on its own
+        if len(groups) == len(partials) and len(partials) > 1:
+            groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+        return groups
+    
+    def _join_partials(self, partials: List[Dict]) -> Dict:
+        """Combine partial summaries without the API, used when a reduce request fails"""
+        highlights = []
+        for partial in partials:
+            highlights.extend(partial['highlights'][:2])
+        return {
+            'summary': '\n\n'.join(partial['summary'] for partial in partials),
+            'highlights': highlights[:5]
+        }
+    
+    def _finish_reduce(self, reduced: Optional[Dict], partials: List[Dict]) -> Dict[str, str]:
+        """Shape a reduced result like generate_summary(), joining partials if reduce failed"""
+        if not reduced:
+            logger.warning("Reduce request failed, joining partial summaries")
+            reduced = self._join_partials(partials)
+        return {
+            'summary': reduced['summary'],
+            'highlights': json.dumps(reduced['highlights'])
+        }
+    
+    def _incomplete_summary(self, agenda_content: str, meeting_title: str, meeting_date: str) -> Dict[str, str]:
+        """
+        Basic summary for a long agenda whose chunks could not all be summarized
+        
+        It is flagged 'incomplete' and never cached, so the agenda stays
+        unprocessed and is summarized again later.
+        """
+        result = self._generate_fallback_summary(agenda_content, meeting_title, meeting_date)
+        result['incomplete'] = True
+        return result
+    
+    def _store_in_cache(self, cache_key: str, result: Dict[str, str]):
+        """Cache a generated summary, unless it is an API error message"""
+        if self.cache and not result['summary'].startswith(API_ERROR_PREFIX):
+            self.cache.set(cache_key, result)
+    
+    async def generate_summaries_async(self, batch: List[Dict], max_concurrency: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Generate summaries for many agendas concurrently with the async OpenAI client
+        
+        At most max_concurrency requests are in flight at once, and all requests
+        share a requests/tokens-per-minute budget. Rate-limited (429) and
+        transient errors are retried with exponential backoff.
+        
+        Args:
+            batch: Dictionaries with 'agenda_content', 'meeting_title' and 'meeting_date' keys
+            max_concurrency: Concurrent request cap, defaults to AI_MAX_CONCURRENCY
             
+        Returns:
+            One result per batch item, in the same order, shaped like generate_summary()
+        """
+        if not self.available:
+            return [
+                self.generate_summary(item['agenda_content'], item['meeting_title'], str(item['meeting_date']))
+                for item in batch
+            ]
+        
+        client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        limiter = AsyncRateLimiter()
+        semaphore = asyncio.Semaphore(max_concurrency or AI_MAX_CONCURRENCY)
+        
+        async def request(params: Dict) -> Optional[Dict]:
+            async with semaphore:
+                return await self._request_structured_async(client, limiter, params)
+        
+        async def fallback(*args) -> Dict[str, str]:
+            async with semaphore:
+                return await asyncio.to_thread(self._generate_separately, *args)
+        
+        try:
+            return await asyncio.gather(*(
+                self._summarize_async(request, fallback, item) for item in batch
+            ))
+        finally:
+            await client.close()
+    
+    async def _summarize_async(self, request, fallback, item: Dict) -> Dict[str, str]:
+        """Async counterpart of generate_summary for one batch item"""
+        agenda_content = item['agenda_content']
+        meeting_title = item['meeting_title']
+        meeting_date = str(item['meeting_date'])
+        
+        if not agenda_content or len(agenda_content.strip()) < 50:
             return {
-                'summary': summary,
-                'highlights': json.dumps(highlights)
+                'summary': "Insufficient content available for summary generation.",
+                'highlights': json.dumps([])
             }
+        
+        # The summary cache is a blocking SQLite store, so it is used from a worker thread
+        cache_key = make_cache_key(agenda_content, meeting_title, meeting_date, self.model, PROMPT_VERSION)
+        if self.cache:
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached:
+                return cached
+        
+        try:
+            result = None
+            chunks = chunk_agenda(agenda_content)
+            
+            if len(chunks) > 1:
+                result = await self._generate_map_reduce_async(request, chunks, meeting_title, meeting_date)
+                if result is None:
+                    return self._incomplete_summary(agenda_content, meeting_title, meeting_date)
+            elif self.single_call:
+                combined = await request(self._combined_request(agenda_content, meeting_title, meeting_date))
+                if combined:
+                    result = {
+                        'summary': combined['summary'],
+                        'highlights': json.dumps(combined['highlights'])
+                    }
+                else:
+                    logger.warning("Structured summary request failed, falling back to separate requests")
             
+            if result is None:
+                result = await fallback(agenda_content, meeting_title, meeting_date)
         except Exception as e:
             logger.error(f"Error generating AI summary: {e}")
             return self._generate_fallback_summary(agenda_content, meeting_title, meeting_date)
+        
+        await asyncio.to_thread(self._store_in_cache, cache_key, result)
+        return result
+    
+    async def _generate_map_reduce_async(self, request, chunks: List[str], title: str, date: str) -> Optional[Dict[str, str]]:
+        """Async counterpart of _generate_map_reduce"""
+        async def summarize_chunk(chunk: str) -> Optional[Dict]:
+            cache_key = make_cache_key(chunk, title, date, self.model, f"{PROMPT_VERSION}-chunk")
+            if self.cache:
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached:
+                    return cached
+            result = await request(self._chunk_request(chunk, title, date))
+            if result and self.cache:
+                await asyncio.to_thread(self.cache.set, cache_key, result)
+            return result
+        
+        partials = await asyncio.gather(*map(summarize_chunk, chunks))
+        if not all(partials):
+            logger.warning(f"{partials.count(None)} of {len(chunks)} agenda chunks could not be summarized")
+            return None
+        
+        while len(partials) > 1:
+            groups = self._reduce_groups(partials)
+            if len(groups) == 1:
+                return self._finish_reduce(await request(self._reduce_request(partials, title, date)), partials)
+            reduced = await asyncio.gather(*(request(self._reduce_request(group, title, date)) for group in groups))
+            partials = [result or self._join_partials(group) for result, group in zip(reduced, groups)]
+        
+        return self._finish_reduce(partials[0], partials)
+    
+    async def _request_structured_async(self, client, limiter: AsyncRateLimiter, request: Dict) -> Optional[Dict]:
+        """Structured (JSON-mode) request with rate limiting and 429-aware retries"""
+        estimated_tokens = estimate_tokens(request)
+        
+        for attempt in range(AI_MAX_RETRIES + 1):
+            await limiter.acquire(estimated_tokens)
+            
+            try:
+                response = await client.chat.completions.create(**request)
+                limiter.reward()
+                if getattr(response, 'usage', None):
+                    limiter.refund(estimated_tokens - response.usage.total_tokens)
+                
+                data = json.loads(response.choices[0].message.content)
+                return self._validate_combined(data)
+                
+            except openai.RateLimitError as e:
+                limiter.penalize()
+                delay = self._retry_after(e) or self._backoff(attempt)
+                logger.warning(f"OpenAI rate limit hit, retrying in {delay:.1f}s")
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                delay = self._backoff(attempt)
+                logger.warning(f"Transient OpenAI error ({e}), retrying in {delay:.1f}s")
+            except json.JSONDecodeError:
+                logger.warning("Structured summary response was not valid JSON")
+                return None
+            except Exception as e:
+                logger.error(f"Error generating structured summary: {e}")
+                return None
+            
+            if attempt < AI_MAX_RETRIES:
+                await asyncio.sleep(delay)
+        
+        logger.error(f"Giving up on structured summary after {AI_MAX_RETRIES + 1} attempts")
+        return None
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with jitter, capped at one minute"""
+        return min(60.0, 2 ** attempt) + random.uniform(0, 1)
+    
+    def _retry_after(self, error) -> Optional[float]:
+        """Delay requested by the provider's Retry-After header, if any"""
+        response = getattr(error, 'response', None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
     
     def _generate_fallback_summary(self, agenda_content: str, meeting_title: str, meeting_date: str) -> Dict[str, str]:
         """Generate a basic summary without AI when API is not available"""
@@ -125,6 +575,150 @@ class AIService:
             'highlights': json.dumps(highlights[:5])  # Limit to 5 highlights
         }
     
+    def _combined_request(self, content: str, title: str, date: str) -> Dict:
+        """Chat completion arguments for the structured summary + highlights request"""
+        prompt = f"""
+        Summarize this meeting agenda from {title} on {date} and extract its key highlights.
+        
+        For the summary, focus on:
+        1. Key agenda items and their importance to the community
+        2. Major decisions, votes, or proposals
+        3. Public concerns or community issues discussed
+        4. Budget items, development projects, or policy changes
+        5. Any controversial or significant topics
+        
+        Write the summary in a clear, journalistic style that would be helpful for residents who want to stay informed about local government activities.
+        
+        For the highlights, pick the 3-5 most newsworthy items that residents would want to know about.
+        
+        Return ONLY a JSON object in exactly this format:
+        {{
+            "summary": "Full summary text...",
+            "highlights": [
+                {{"title": "New Park Development Approved", "description": "City council approved funding for a new community park in the downtown area."}}
+            ]
+        }}
+        
+        Meeting Content:
+        {content[:AI_CHUNK_CHARS]}
+        """
+        
+        return self._structured_request(prompt, max_tokens=1300)
+    
+    def _chunk_request(self, chunk: str, title: str, date: str) -> Dict:
+        """Chat completion arguments for summarizing one section of a long agenda"""
+        prompt = f"""
+        The following is one section of a longer meeting agenda from {title} on {date}.
+        
+        Summarize the agenda items in this section, keeping dollar amounts, votes, ordinance and resolution numbers, and locations.
+        Also list up to 3 highlights from this section that residents would want to know about.
+        
+        Return ONLY a JSON object in exactly this format:
+        {{
+            "summary": "Summary of this section...",
+            "highlights": [
+                {{"title": "Short headline", "description": "One-sentence description."}}
+            ]
+        }}
+        
+        Agenda Section:
+        {chunk}
+        """
+        
+        return self._structured_request(prompt, max_tokens=600)
+    
+    def _format_partial(self, partial: Dict) -> str:
+        """Render a partial summary as input for a reduce request"""
+        highlights = '; '.join(f"{item['title']}: {item['description']}" for item in partial['highlights'])
+        return f"{partial['summary']}\nHighlights: {highlights or 'none'}"
+    
+    def _reduce_request(self, partials: List[Dict], title: str, date: str) -> Dict:
+        """Chat completion arguments for combining section summaries into one"""
+        sections = '\n\n'.join(
+            f"Section {index}:\n{self._format_partial(partial)}"
+            for index, partial in enumerate(partials, 1)
+        )
+        prompt = f"""
+        Below are summaries of consecutive sections of the meeting agenda from {title} on {date}.
+        
+        Combine them into one comprehensive summary of the whole meeting, written in a clear, journalistic style for residents, and pick the 3-5 most newsworthy highlights overall.
+        
+        Return ONLY a JSON object in exactly this format:
+        {{
+            "summary": "Full summary text...",
+            "highlights": [
+                {{"title": "New Park Development Approved", "description": "City council approved funding for a new community park in the downtown area."}}
+            ]
+        }}
+        
+        Section Summaries:
+        {sections}
+        """
+        
+        return self._structured_request(prompt, max_tokens=1300)
+    
+    def _structured_request(self, prompt: str, max_tokens: int) -> Dict:
+        """Chat completion arguments for a JSON-mode request"""
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": "You are a skilled local news reporter who specializes in covering municipal government meetings. Return only valid JSON format as requested."},
+                {"role": "user", "content": prompt}
+            ],
+            'response_format': {"type": "json_object"},
+            'max_tokens': max_tokens,
+            'temperature': 0.6
+        }
+    
+    def _generate_combined(self, content: str, title: str, date: str) -> Optional[Dict]:
+        """
+        Generate the summary and highlights together in one JSON-mode request
+        
+        Returns:
+            Dictionary with 'summary' (str) and 'highlights' (list) keys, or None
+            if the request failed or the response did not match the schema
+        """
+        return self._request_structured(self._combined_request(content, title, date))
+    
+    def _request_structured(self, request: Dict) -> Optional[Dict]:
+        """Send a JSON-mode request and validate the response against the summary schema"""
+        try:
+            response = self.client.chat.completions.create(**request)
+            data = json.loads(response.choices[0].message.content)
+            return self._validate_combined(data)
+            
+        except json.JSONDecodeError:
+            logger.warning("Structured summary response was not valid JSON")
+            return None
+        except Exception as e:
+            logger.error(f"Error generating structured summary: {e}")
+            return None
+    
+    def _validate_combined(self, data) -> Optional[Dict]:
+        """Check a structured response against the expected schema"""
+        if not isinstance(data, dict):
+            return None
+        
+        summary = data.get('summary')
+        highlights = data.get('highlights')
+        if not isinstance(summary, str) or not summary.strip() or not isinstance(highlights, list):
+            return None
+        
+        valid_highlights = [
+            {'title': item['title'].strip(), 'description': item['description'].strip()}
+            for item in highlights
+            if isinstance(item, dict)
+            and isinstance(item.get('title'), str)
+            and isinstance(item.get('description'), str)
+        ]
+        if highlights and not valid_highlights:
+            return None
+        
+        return {
+            'summary': summary.strip(),
+            'highlights': valid_highlights[:5]  # Limit to 5 highlights
+        }
+    
     def _generate_detailed_summary(self, content: str, title: str, date: str) -> str:
         """Generate a detailed summary of the meeting agenda"""
         prompt = f"""
@@ -140,12 +734,12 @@ class AIService:
         Write in a clear, journalistic style that would be helpful for residents who want to stay informed about local government activities.
         
         Meeting Content:
-        {content[:4000]}  
+        {content[:AI_CHUNK_CHARS]}
         """
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a skilled local news reporter who specializes in covering municipal government meetings. Provide clear, informative summaries that help residents understand what happened and why it matters."},
                     {"role": "user", "content": prompt}
@@ -158,7 +752,7 @@ class AIService:
             
         except Exception as e:
             logger.error(f"Error generating detailed summary: {e}")
-            return f"Unable to generate summary due to API error: {str(e)}"
+            return f"{API_ERROR_PREFIX}: {str(e)}"
     
     def _generate_highlights(self, content: str, title: str, date: str) -> List[Dict[str, str]]:
         """Generate key highlights as a list of important points"""
@@ -175,12 +769,12 @@ class AIService:
         ]
         
         Meeting Content:
-        {content[:3000]}
+        {content[:AI_CHUNK_CHARS]}
         """
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a local news editor extracting key highlights. Return only valid JSON format as requested."},
                     {"role": "user", "content": prompt}
@@ -232,7 +826,7 @@ class AIService:
             
         try:
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=self.model,
                 messages=[{"role": "user", "content": "Hello, this is a test."}],
                 max_tokens=10
             )
@@ -6,14 +6,22 @@ Enhanced with meeting agenda scraping and AI summaries
 
 from flask import Flask, render_template, jsonify, request, redirect, url_for, flash
 from flask_cors import CORS
+from sqlalchemy.orm import defer
 import os
 import json
+import math
 import logging
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # Import our custom modules
 from models import db, MeetingAgenda, ScrapingLog
+from metrics import fetch_percentiles, METRICS_WINDOW_DAYS, METRICS_CACHE_SECONDS
+from migrations import migrate_database
+from pagination import keyset_paginate
+from response_cache import cached_response, cached_fragment, skip_response_cache, get_response_cache
+from stats import meeting_counts
+from search import search_available, search_meetings, search_terms
 from scrapers import scrape_all_sources
 from ai_service import AIService
 from tasks import make_celery, scrape_and_process_agendas, generate_missing_summaries
@@ -50,38 +58,42 @@ def create_app():
     # Add custom Jinja filters
     @app.template_filter('from_json')
     def from_json_filter(value):
-        """Parse JSON string into Python object"""
+        """Parse JSON string into Python object (already decoded JSON columns pass through)"""
+        if isinstance(value, (list, dict)):
+            return value
         try:
             return json.loads(value) if value else []
         except (json.JSONDecodeError, TypeError):
             return []
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # The schema is created and upgraded by `manage.py migrate`, which runs
+    # once before the web workers start (see render.yaml)
+    
+    # Open the response cache now so a misconfigured one is reported at startup
+    get_response_cache()
     
     # Routes
     @app.route('/')
+    @cached_response
     def index():
         """Homepage with recent meeting highlights"""
         try:
             # Get recent meetings with AI summaries
-            recent_meetings = MeetingAgenda.query.filter(
+            recent_meetings = MeetingAgenda.query.options(
+                defer(MeetingAgenda.agenda_content), defer(MeetingAgenda.ai_summary)
+            ).filter(
                 MeetingAgenda.is_processed == True,
                 MeetingAgenda.ai_highlights.isnot(None)
             ).order_by(MeetingAgenda.meeting_date.desc()).limit(6).all()
             
-            # Parse highlights for display
-            meeting_highlights = []
-            for meeting in recent_meetings:
-                try:
-                    highlights = json.loads(meeting.ai_highlights) if meeting.ai_highlights else []
-                    meeting_highlights.append({
-                        'meeting': meeting,
-                        'highlights': highlights[:3]  # Show top 3 highlights
-                    })
-                except json.JSONDecodeError:
-                    continue
+            # Highlights are decoded when the rows are loaded
+            meeting_highlights = [
+                {
+                    'meeting': meeting,
+                    'highlights': meeting.highlights[:3]  # Show top 3 highlights
+                }
+                for meeting in recent_meetings
+            ]
             
             return render_template('index.html', 
                                  title='Williamsburg Local News - Your Community Source',
@@ -89,28 +101,32 @@ def create_app():
                                  meeting_highlights=meeting_highlights)
         except Exception as e:
             app.logger.error(f"Error loading homepage: {e}")
+            skip_response_cache()
             return render_template('index.html', 
                                  title='Williamsburg Local News - Your Community Source',
                                  current_year=datetime.now().year,
                                  meeting_highlights=[])
     
     @app.route('/meetings')
+    @cached_response
     def meetings():
         """Meeting agendas and summaries page"""
         try:
-            page = request.args.get('page', 1, type=int)
             source = request.args.get('source', '')
             
-            # Build query
-            query = MeetingAgenda.query
+            # Build query; the listing never shows the full agenda text
+            query = MeetingAgenda.query.options(defer(MeetingAgenda.agenda_content))
             
             if source:
                 query = query.filter(MeetingAgenda.source == source)
             
-            # Paginate results
-            meetings = query.order_by(MeetingAgenda.meeting_date.desc()).paginate(
-                page=page, per_page=10, error_out=False
-            )
+            # Keyset pagination: constant cost however deep the page
+            try:
+                meetings = keyset_paginate(query, per_page=10,
+                                           after=request.args.get('after'),
+                                           before=request.args.get('before'))
+            except ValueError:
+                meetings = keyset_paginate(query, per_page=10)
             
             return render_template('meetings.html',
                                  title='Meeting Agendas & Summaries',
@@ -118,29 +134,23 @@ def create_app():
                                  current_source=source)
         except Exception as e:
             app.logger.error(f"Error loading meetings page: {e}")
+            skip_response_cache()
             return render_template('meetings.html',
                                  title='Meeting Agendas & Summaries',
                                  meetings=None,
                                  current_source='')
     
     @app.route('/meeting/<int:meeting_id>')
+    @cached_response
     def meeting_detail(meeting_id):
         """Detailed view of a specific meeting"""
         try:
             meeting = MeetingAgenda.query.get_or_404(meeting_id)
             
-            # Parse highlights
-            highlights = []
-            if meeting.ai_highlights:
-                try:
-                    highlights = json.loads(meeting.ai_highlights)
-                except json.JSONDecodeError:
-                    pass
-            
             return render_template('meeting_detail.html',
                                  title=f"{meeting.meeting_title} - Meeting Details",
                                  meeting=meeting,
-                                 highlights=highlights)
+                                 highlights=meeting.highlights)
         except Exception as e:
             app.logger.error(f"Error loading meeting detail: {e}")
     
@@ -164,31 +174,23 @@ def create_app():
             # Get recent scraping logs
             recent_logs = ScrapingLog.query.order_by(ScrapingLog.started_at.desc()).limit(10).all()
             
-            # Get meeting statistics
-            total_meetings = MeetingAgenda.query.count()
-            processed_meetings = MeetingAgenda.query.filter(MeetingAgenda.is_processed == True).count()
-            
-            # Get meetings by source
-            williamsburg_count = MeetingAgenda.query.filter(MeetingAgenda.source == 'williamsburg').count()
-            jamescity_count = MeetingAgenda.query.filter(MeetingAgenda.source == 'jamescity').count()
-            
-            stats = {
-                'total_meetings': total_meetings,
-                'processed_meetings': processed_meetings,
-                'williamsburg_count': williamsburg_count,
-                'jamescity_count': jamescity_count
-            }
+            # Meeting counts per source, one GROUP BY query per data version
+            stats = cached_fragment('meeting_counts', meeting_counts)
             
             return render_template('admin.html',
                                  title='Admin Dashboard',
                                  stats=stats,
-                                 recent_logs=recent_logs)
+                                 recent_logs=recent_logs,
+                                 timings=cached_fragment('fetch_percentiles', fetch_percentiles, ttl=METRICS_CACHE_SECONDS),
+                                 timing_days=METRICS_WINDOW_DAYS)
         except Exception as e:
             app.logger.error(f"Error loading admin dashboard: {e}")
             return render_template('admin.html',
                                  title='Admin Dashboard',
                                  stats={},
-                                 recent_logs=[])
+                                 recent_logs=[],
+                                 timings=[],
+                                 timing_days=METRICS_WINDOW_DAYS)
     
     @app.route('/api/health')
     def health_check():
@@ -360,30 +362,95 @@ def create_app():
         return jsonify({'events': upcoming_events})
     
     @app.route('/api/meetings')
+    @cached_response
     def api_meetings():
         """API endpoint for meeting data"""
         try:
-            page = request.args.get('page', 1, type=int)
+            page = request.args.get('page', type=int)
             source = request.args.get('source', '')
+            count = request.args.get('count', '1') != '0'
+            
+            try:
+                fields = MeetingAgenda.parse_fields(request.args.get('fields'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
-            query = MeetingAgenda.query
+            # Only load the requested columns
+            query = MeetingAgenda.query.options(MeetingAgenda.load_only_fields(fields))
             if source:
                 query = query.filter(MeetingAgenda.source == source)
             
-            meetings = query.order_by(MeetingAgenda.meeting_date.desc()).paginate(
-                page=page, per_page=20, error_out=False
-            )
+            if page:
+                # Legacy page-number pagination (COUNT plus OFFSET)
+                meetings = query.order_by(MeetingAgenda.meeting_date.desc()).paginate(
+                    page=page, per_page=20, error_out=False
+                )
+                
+                return jsonify({
+                    'meetings': [meeting.to_dict(fields) for meeting in meetings.items],
+                    'total': meetings.total,
+                    'pages': meetings.pages,
+                    'current_page': page
+                })
             
+            try:
+                meetings = keyset_paginate(query, per_page=20,
+                                           after=request.args.get('after'),
+                                           before=request.args.get('before'),
+                                           count=count)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            link_args = {'source': source or None, 'count': None if count else 0, 'fields': request.args.get('fields') or None}
+            response = {
+                'meetings': [meeting.to_dict(fields) for meeting in meetings.items],
+                'next_cursor': meetings.next_cursor,
+                'prev_cursor': meetings.prev_cursor,
+                'next': url_for('api_meetings', after=meetings.next_cursor, **link_args) if meetings.next_cursor else None,
+                'prev': url_for('api_meetings', before=meetings.prev_cursor, **link_args) if meetings.prev_cursor else None
+            }
+            if count:
+                response['total'] = meetings.total
+                response['pages'] = math.ceil(meetings.total / 20)
+            return jsonify(response)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/search')
+    @cached_response
+    def api_search():
+        """API endpoint for full-text search over meeting titles, agendas and summaries"""
+        try:
+            query = request.args.get('q', '').strip()
+            source = request.args.get('source', '')
+            page = max(request.args.get('page', 1, type=int), 1)
+            per_page = min(max(request.args.get('per_page', 20, type=int), 1), 50)
+            
+            if not search_terms(query):
+                return jsonify({'error': 'Missing search query: q'}), 400
+            if not search_available():
+                return jsonify({'error': 'Search is not available'}), 503
+            
+            # One extra result tells whether there is a next page
+            results = search_meetings(query, limit=per_page + 1, offset=(page - 1) * per_page, source=source or None)
+            for result in results:
+                result['meeting_date'] = result['meeting_date'].isoformat() if result['meeting_date'] else None
+                result['url'] = url_for('meeting_detail', meeting_id=result['id'])
+            
+            has_next = len(results) > per_page
+            link_args = {'q': query, 'source': source or None, 'per_page': per_page if per_page != 20 else None}
             return jsonify({
-                'meetings': [meeting.to_dict() for meeting in meetings.items],
-                'total': meetings.total,
-                'pages': meetings.pages,
-                'current_page': page
+                'query': query,
+                'results': results[:per_page],
+                'page': page,
+                'next': url_for('api_search', page=page + 1, **link_args) if has_next else None,
+                'prev': url_for('api_search', page=page - 1, **link_args) if page > 1 else None
             })
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @app.route('/api/meeting/<int:meeting_id>')
+    @cached_response
     def api_meeting_detail(meeting_id):
         """API endpoint for individual meeting data"""
         try:
@@ -408,5 +475,9 @@ def create_app():
 app = create_app()
 
 if __name__ == '__main__':
+    # Single development process, so it can migrate on start
+    with app.app_context():
+        migrate_database()
+    
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=app.config['DEBUG'])
@@ -0,0 +1,73 @@
+"""
+Date extraction for scraped meeting listings and document titles
+
+Every spelling the scrapers accept is matched by one precompiled regex, and
+results are memoized on the raw string, since listings repeat the same date
+cells and titles over and over (especially during backfills).
+"""
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Optional
+
+DATE_CACHE_SIZE = 4096
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# One alternative per spelling, tried left to right at each position:
+#   1/14/2025, 01-14-2025            (month first; day first if that is invalid)
+#   2025-01-14, 2025/1/14
+#   January 14, 2025, Jan. 14 2025, Sept 9, 2025
+DATE_PATTERN = re.compile(
+    r'(?P<mdy_month>\d{1,2})(?P<mdy_sep>[-/])(?P<mdy_day>\d{1,2})(?P=mdy_sep)(?P<mdy_year>\d{4})'
+    r'|(?P<ymd_year>\d{4})(?P<ymd_sep>[-/])(?P<ymd_month>\d{1,2})(?P=ymd_sep)(?P<ymd_day>\d{1,2})'
+    r'|\b(?P<name_month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+    r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?\s+(?P<name_day>\d{1,2}),?\s+(?P<name_year>\d{4})',
+    re.IGNORECASE
+)
+
+# Last resort: January 1st of a year mentioned on its own
+YEAR_PATTERN = re.compile(r'(?<!\d)(?:19|20)\d{2}(?!\d)')
+
+def _make_date(year: str, month: str, day: str) -> Optional[date]:
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+def _match_date(match: re.Match) -> Optional[date]:
+    """The date a DATE_PATTERN match spells, or None if it is not a real date"""
+    groups = match.groupdict()
+    if groups['mdy_year']:
+        parsed = _make_date(groups['mdy_year'], groups['mdy_month'], groups['mdy_day'])
+        if parsed is None and groups['mdy_sep'] == '/':
+            parsed = _make_date(groups['mdy_year'], groups['mdy_day'], groups['mdy_month'])
+        return parsed
+    if groups['ymd_year']:
+        return _make_date(groups['ymd_year'], groups['ymd_month'], groups['ymd_day'])
+    return _make_date(groups['name_year'], MONTHS[groups['name_month'][:3].lower()], groups['name_day'])
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(text: Optional[str]) -> Optional[date]:
+    """
+    First valid date in a listing cell or document title
+
+    Falls back to January 1st of a year that appears on its own, and
+    returns None if there is neither.
+    """
+    if not text:
+        return None
+
+    for match in DATE_PATTERN.finditer(text):
+        parsed = _match_date(match)
+        if parsed:
+            return parsed
+
+    year_match = YEAR_PATTERN.search(text)
+    if year_match:
+        return date(int(year_match.group()), 1, 1)
+    return None
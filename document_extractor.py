@@ -0,0 +1,266 @@
+"""
+Text extraction for agenda documents (PDF and DOCX)
+
+Parsing is CPU-bound, so documents are extracted in a process pool. The
+pool is billiard's (Celery's fork of multiprocessing), which can start
+worker processes from inside daemonic Celery prefork workers, where the
+scrapers run. Page and byte caps keep a single huge agenda packet from tying
+up a worker, an extraction that runs past its timeout has its worker killed,
+and extracted text is cached on disk by the SHA-256 of the document bytes.
+"""
+
+import os
+import time
+import signal
+import zipfile
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from xml.etree import ElementTree
+
+from billiard.pool import Pool, ApplyResult
+from billiard.exceptions import TimeoutError as ExtractionTimeout
+
+from http_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+MAX_DOCUMENT_BYTES = int(float(os.getenv('DOC_MAX_MB', '25')) * 1024 * 1024)
+MAX_DOCUMENT_PAGES = int(os.getenv('DOC_MAX_PAGES', '200'))
+MAX_DOCUMENT_CHARS = int(os.getenv('DOC_MAX_CHARS', '200000'))
+EXTRACT_TIMEOUT = float(os.getenv('DOC_EXTRACT_TIMEOUT', '120'))
+DOCUMENT_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'documents')
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+def extract_text(path: str, extension: str, max_pages: int = MAX_DOCUMENT_PAGES,
+                 max_chars: int = MAX_DOCUMENT_CHARS) -> str:
+    """
+    Extract plain text from a PDF or DOCX file
+
+    Runs in a worker process, so it only takes picklable arguments.
+    """
+    if extension == '.pdf':
+        return _extract_pdf(path, max_pages, max_chars)
+    if extension == '.docx':
+        return _extract_docx(path, max_chars)
+    return ''
+
+class Extraction(NamedTuple):
+    """Text extracted from a document and the time spent on it"""
+    text: str
+    seconds: float
+
+def extract_text_timed(path: str, extension: str) -> Extraction:
+    """extract_text, also reporting how long extraction took in the worker"""
+    started = time.perf_counter()
+    text = extract_text(path, extension)
+    return Extraction(text, time.perf_counter() - started)
+
+def _extract_pdf(path: str, max_pages: int, max_chars: int) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.warning("pypdf is not installed - PDF text extraction is disabled")
+        return ''
+
+    reader = PdfReader(path)
+    parts = []
+    length = 0
+
+    for page in reader.pages[:max_pages]:
+        text = page.extract_text() or ''
+        parts.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+
+    return '\n'.join(parts)[:max_chars]
+
+def _extract_docx(path: str, max_chars: int) -> str:
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('word/document.xml') as document:
+            tree = ElementTree.parse(document)
+
+    paragraphs = []
+    length = 0
+    for paragraph in tree.iter(f'{WORD_NAMESPACE}p'):
+        text = ''.join(node.text or '' for node in paragraph.iter(f'{WORD_NAMESPACE}t'))
+        if text.strip():
+            paragraphs.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+
+    return '\n'.join(paragraphs)[:max_chars]
+
+def document_extension(url: str) -> str:
+    """Lower-case file extension of a document URL, ignoring any query string"""
+    path = url.split('?', 1)[0].split('#', 1)[0]
+    return os.path.splitext(path)[1].lower()
+
+class DocumentTextCache:
+    """
+    Size-bounded LRU cache of extracted document text keyed by content hash
+
+    Bookkeeping and the size limit (SCRAPER_CACHE_MAX_MB) follow HTTPCache:
+    the index is rebuilt from file mtimes, reads mark an entry as recently
+    used and writes evict the least recently used entries beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DOCUMENT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        # content hash -> file size, least recently used first
+        self.index: 'OrderedDict[str, int]' = OrderedDict()
+        self.total_bytes = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.txt")
+
+    def _load_index(self):
+        """Rebuild the LRU index from the files on disk, oldest access first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.txt'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, name[:-len('.txt')], stat.st_size))
+            except OSError:
+                continue
+
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.total_bytes += size
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """Previously extracted text for a document with this content hash"""
+        with self.lock:
+            try:
+                with open(self._path(content_hash), 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except OSError:
+                return None
+
+            if content_hash in self.index:
+                self.index.move_to_end(content_hash)
+            try:
+                os.utime(self._path(content_hash))
+            except OSError:
+                pass
+            return text
+
+    def set(self, content_hash: str, text: str):
+        """Store extracted text, evicting old entries to stay within max_bytes"""
+        data = text.encode('utf-8')
+        path = self._path(content_hash)
+
+        with self.lock:
+            try:
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not cache extracted text: {e}")
+                return
+
+            self.total_bytes += len(data) - self.index.get(content_hash, 0)
+            self.index[content_hash] = len(data)
+            self.index.move_to_end(content_hash)
+
+            while self.total_bytes > self.max_bytes and self.index:
+                key, size = self.index.popitem(last=False)
+                self.total_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+_default_text_cache: Optional[DocumentTextCache] = None
+_default_text_cache_lock = threading.Lock()
+
+def get_default_text_cache() -> Optional[DocumentTextCache]:
+    """Process-wide extracted text cache, or None if it can't be opened"""
+    global _default_text_cache
+
+    with _default_text_cache_lock:
+        if _default_text_cache is None:
+            try:
+                _default_text_cache = DocumentTextCache()
+            except OSError as e:
+                logger.warning(f"Document text cache disabled, could not open {DOCUMENT_CACHE_DIR}: {e}")
+                return None
+        return _default_text_cache
+
+class DocumentExtractor:
+    """
+    Process pool for document text extraction with an on-disk result cache
+
+    Use as a context manager; leaving it kills any extraction still running.
+    The pool is only started by the first submit(), so a batch served
+    entirely from the cache never forks workers. Jobs returned by submit()
+    can be polled with ready().
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cache: Optional[DocumentTextCache] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = cache if cache is not None else get_default_text_cache()
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # Kill extractions that are still running (e.g. ones that timed out)
+        # rather than leaving them to finish in the background
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def cached_text(self, content_hash: str) -> Optional[str]:
+        """Previously extracted text for a document with this content hash"""
+        return self.cache.get(content_hash) if self.cache else None
+
+    def store_text(self, content_hash: str, text: str):
+        if self.cache:
+            self.cache.set(content_hash, text)
+
+    def submit(self, path: str, extension: str) -> ApplyResult:
+        """Queue a downloaded document for extraction"""
+        if self.pool is None:
+            self.pool = Pool(processes=self.max_workers)
+        return self.pool.apply_async(extract_text_timed, (path, extension))
+
+    def result(self, job: ApplyResult, timeout: float = EXTRACT_TIMEOUT) -> Optional[Extraction]:
+        """
+        Wait for an extraction, killing its worker after timeout seconds
+
+        Returns:
+            The extraction, or None if it failed
+
+        Raises:
+            ExtractionTimeout: If it was still running after timeout seconds
+        """
+        try:
+            return job.get(timeout=timeout)
+        except ExtractionTimeout:
+            # The pool starts a replacement for the killed worker
+            for pid in job.worker_pids():
+                self.pool.terminate_job(pid, signal.SIGKILL)
+            raise
+        except Exception as e:
+            logger.warning(f"Document extraction failed: {e}")
+            return None
@@ -0,0 +1,226 @@
+"""
+On-disk HTTP cache for scraper page fetches
+
+Stores response bodies together with their ETag/Last-Modified validators so
+repeat scrapes can send conditional requests and reuse the stored body when
+the server answers 304 Not Modified.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv('SCRAPER_CACHE_DIR', '.scraper_cache')
+DEFAULT_CACHE_MAX_BYTES = int(float(os.getenv('SCRAPER_CACHE_MAX_MB', '200')) * 1024 * 1024)
+
+class HTTPCache:
+    """Size-bounded LRU cache of HTTP responses keyed by URL"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        # key -> body size, least recently used first
+        self.index: 'OrderedDict[str, int]' = OrderedDict()
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _load_index(self):
+        """Rebuild the LRU index from the files on disk, oldest access first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.body'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, name[:-len('.body')], stat.st_size))
+            except OSError:
+                continue
+
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.total_bytes += size
+
+    def _read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_atomic(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _touch(self, key: str):
+        """Mark an entry as most recently used"""
+        if key in self.index:
+            self.index.move_to_end(key)
+        try:
+            os.utime(self._body_path(key))
+        except OSError:
+            pass
+
+    def _remove(self, key: str):
+        self.total_bytes -= self.index.pop(key, 0)
+        for path in (self._meta_path(key), self._body_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        while self.total_bytes > self.max_bytes and self.index:
+            key = next(iter(self.index))
+            self._remove(key)
+            self.evictions += 1
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a cached URL (empty if not cached)"""
+        with self.lock:
+            key = self._key(url)
+            if key not in self.index:
+                return {}
+            meta = self._read_meta(key)
+
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def get_body(self, url: str) -> Optional[bytes]:
+        """Return the cached body for a URL after a 304, counting a hit"""
+        with self.lock:
+            key = self._key(url)
+            try:
+                with open(self._body_path(key), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                return None
+
+            self.hits += 1
+            self._touch(key)
+            return body
+
+    def store(self, url: str, response) -> None:
+        """Store a 200 response body and its validators, counting a miss"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        with self.lock:
+            self.misses += 1
+
+            # Nothing to revalidate against, so there is no point keeping it
+            if not etag and not last_modified:
+                return
+
+            key = self._key(url)
+            body = response.content
+            meta = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': len(body),
+                'stored_at': time.time(),
+                'derived': {}
+            }
+
+            try:
+                self._write_atomic(self._body_path(key), body)
+                self._write_atomic(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+            except OSError as e:
+                logger.warning(f"Could not write HTTP cache entry for {url}: {e}")
+                return
+
+            self.total_bytes += len(body) - self.index.get(key, 0)
+            self.index[key] = len(body)
+            self.index.move_to_end(key)
+            self._evict()
+
+    def get_derived(self, url: str, name: str) -> Optional[Any]:
+        """
+        Return a value previously computed from the cached body of a URL
+
+        Lets callers skip re-parsing a page the server reported as unchanged.
+        """
+        with self.lock:
+            meta = self._read_meta(self._key(url))
+        if not meta:
+            return None
+        return meta.get('derived', {}).get(name)
+
+    def set_derived(self, url: str, name: str, value: Any) -> None:
+        """Attach a JSON-serializable value computed from the cached body of a URL"""
+        with self.lock:
+            key = self._key(url)
+            if key not in self.index:
+                return
+            meta = self._read_meta(key)
+            if not meta:
+                return
+            meta.setdefault('derived', {})[name] = value
+            try:
+                self._write_atomic(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+            except OSError as e:
+                logger.warning(f"Could not update HTTP cache entry for {url}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.index),
+                'bytes': self.total_bytes
+            }
+
+_default_cache: Optional[HTTPCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache() -> Optional[HTTPCache]:
+    """Process-wide cache shared by all scrapers, or None if disabled"""
+    global _default_cache
+
+    if os.getenv('SCRAPER_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = HTTPCache()
+            except OSError as e:
+                logger.warning(f"HTTP cache disabled, could not open {DEFAULT_CACHE_DIR}: {e}")
+                return None
+        return _default_cache
@@ -0,0 +1,144 @@
+"""
+Shared HTTP session for the scrapers
+
+All scrapers in a process share one requests.Session, so connections to a
+host are kept alive and reused across scrapers, runs and worker threads
+instead of paying a new TCP/TLS handshake per scraper.
+
+The session itself only retries failed connections. Read timeouts, 429 and
+5xx responses are retried by BaseScraper.fetch, which knows how much of the
+scraper's time budget is left.
+"""
+
+import os
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Connections kept open per host; should cover the scrapers' per-host concurrency
+POOL_MAXSIZE = int(os.getenv('SCRAPER_POOL_MAXSIZE', '8'))
+# Number of hosts whose pools are kept
+POOL_HOSTS = int(os.getenv('SCRAPER_POOL_HOSTS', '20'))
+
+# Retries for connection errors, read timeouts, 429 and 5xx responses, with exponential backoff
+RETRY_TOTAL = int(os.getenv('SCRAPER_RETRIES', '3'))
+RETRY_BACKOFF = float(os.getenv('SCRAPER_RETRY_BACKOFF', '0.5'))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Upper bound on the time allowed to establish a connection, per attempt
+CONNECT_TIMEOUT = float(os.getenv('SCRAPER_CONNECT_TIMEOUT', '10'))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+def _accept_encoding() -> str:
+    """Only advertise brotli when urllib3 can decode it"""
+    try:
+        import brotli  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        pass
+    try:
+        import brotlicffi  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        return 'gzip, deflate'
+
+def create_session(pool_maxsize: int = POOL_MAXSIZE, retries: int = RETRY_TOTAL,
+                   backoff_factor: float = RETRY_BACKOFF) -> requests.Session:
+    """Build a session with sized connection pools that retries failed connections"""
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=False,  # Raise read timeouts as-is; they and error statuses are retried by BaseScraper.fetch
+        status=0,
+        other=0,
+        respect_retry_after_header=False,
+        backoff_factor=backoff_factor,
+        allowed_methods=frozenset(['GET', 'HEAD'])
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': _accept_encoding()
+    })
+    return session
+
+def request_timeout(timeout: float, retries: int = RETRY_TOTAL) -> Tuple[float, float]:
+    """
+    (connect, read) timeout for a request that should take at most about timeout seconds
+
+    The connect timeout is split across the session's connection retries.
+    """
+    return min(CONNECT_TIMEOUT, timeout / (retries + 1)), timeout
+
+def retry_delay(attempt: int, response: Optional[requests.Response] = None,
+                backoff_factor: float = RETRY_BACKOFF) -> float:
+    """Seconds to wait before retrying attempt (0-based), honouring a longer Retry-After"""
+    delay = backoff_factor * (2 ** attempt)
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return delay
+
+    try:
+        retry_after = float(value)
+    except ValueError:
+        try:
+            retry_after = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return delay
+    return max(delay, retry_after)
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Process-wide scraper session
+
+    A new session is created after a fork (e.g. in Celery prefork workers)
+    so processes never share sockets.
+    """
+    global _session, _session_pid
+
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = create_session()
+            _session_pid = os.getpid()
+        return _session
+
+def connection_stats(session: requests.Session) -> Dict[str, Dict[str, int]]:
+    """
+    Per-host connection reuse counters for a session
+
+    'connections' is the number of connections opened (one TCP/TLS handshake
+    each) and 'requests' the number of requests sent over them.
+    """
+    stats = {}
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            host = f"{pool.host}:{pool.port}" if pool.port else pool.host
+            host_stats = stats.setdefault(host, {'connections': 0, 'requests': 0, 'reused': 0})
+            host_stats['connections'] += pool.num_connections
+            host_stats['requests'] += pool.num_requests
+
+    for host_stats in stats.values():
+        host_stats['reused'] = max(0, host_stats['requests'] - host_stats['connections'])
+    return stats
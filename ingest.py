@@ -0,0 +1,268 @@
+"""
+Bulk ingest of scraped meeting agendas
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, MeetingAgenda
+from ai_service import split_agenda_sections
+from search import index_agendas
+from summary_cache import normalize_content
+
+logger = logging.getLogger(__name__)
+
+# Columns a scraper record maps onto
+AGENDA_FIELDS = ('meeting_date', 'meeting_title', 'original_url', 'agenda_content', 'source')
+
+DEFAULT_BATCH_SIZE = 500
+
+# Streaming ingest flushes a batch once it is this big or this old, so the
+# first rows of a long scrape land within seconds
+STREAM_BATCH_SIZE = int(os.getenv('INGEST_STREAM_BATCH_SIZE', '50'))
+STREAM_FLUSH_SECONDS = float(os.getenv('INGEST_STREAM_FLUSH_SECONDS', '5'))
+
+# Stored agendas for meetings within this many days are fetched again on
+# incremental scrapes and updated if their content changed
+REFRESH_DAYS = int(os.getenv('AGENDA_REFRESH_DAYS', '14'))
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(normalize_content(text).encode('utf-8')).hexdigest()
+
+def content_fingerprint(content: Optional[str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Hash of the normalized agenda text plus one hash per agenda section
+
+    Whitespace-only changes keep the same fingerprint. Returns (None, []) for
+    empty content.
+    """
+    if not normalize_content(content):
+        return None, []
+    return _hash_text(content), [_hash_text(section) for section in split_agenda_sections(content)]
+
+def _fingerprint_columns(content: Optional[str]) -> Dict:
+    content_hash, section_hashes = content_fingerprint(content)
+    return {
+        'content_hash': content_hash,
+        'section_hashes': json.dumps(section_hashes) if content_hash else None
+    }
+
+def _insert_ignore_duplicates():
+    """Build an INSERT that silently skips rows whose original_url already exists"""
+    dialect = db.engine.dialect.name
+
+    if dialect == 'postgresql':
+        return postgresql.insert(MeetingAgenda).on_conflict_do_nothing(index_elements=['original_url'])
+    if dialect == 'sqlite':
+        return sqlite.insert(MeetingAgenda).on_conflict_do_nothing(index_elements=['original_url'])
+
+    # Other backends: rows were already filtered against existing URLs
+    return insert(MeetingAgenda)
+
+def bulk_insert_agendas(agendas: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict]:
+    """
+    Insert scraped agendas in batches, skipping URLs that are already stored
+
+    Each batch is de-duplicated in memory, checked against the database with a
+    single IN query and written with one multi-row INSERT ... ON CONFLICT DO
+    NOTHING, so the number of round trips does not grow with the batch size.
+    New rows are added to the search index. The caller is responsible for
+    committing.
+
+    Args:
+        agendas: Scraper records with the keys in AGENDA_FIELDS
+        batch_size: Maximum number of records per INSERT
+
+    Returns:
+        The newly inserted records, each with its new 'id'
+    """
+    inserted = []
+    batch = []
+
+    for agenda in agendas:
+        batch.append(agenda)
+        if len(batch) >= batch_size:
+            inserted.extend(_insert_batch(batch))
+            batch = []
+
+    if batch:
+        inserted.extend(_insert_batch(batch))
+
+    return inserted
+
+def _insert_batch(batch: List[Dict]) -> List[Dict]:
+    """Insert one batch of agendas; returns the records that were new"""
+    # De-duplicate within the batch, first occurrence wins
+    by_url = {}
+    for agenda in batch:
+        if not agenda.get('original_url') or not agenda.get('meeting_date') or not agenda.get('meeting_title'):
+            logger.warning(f"Skipping agenda with missing required fields: {agenda.get('original_url')}")
+            continue
+        by_url.setdefault(agenda['original_url'], agenda)
+
+    if not by_url:
+        return []
+
+    existing = {
+        url for (url,) in db.session.query(MeetingAgenda.original_url)
+        .filter(MeetingAgenda.original_url.in_(list(by_url)))
+    }
+
+    rows = [
+        dict({field: agenda.get(field) for field in AGENDA_FIELDS}, **_fingerprint_columns(agenda.get('agenda_content')))
+        for url, agenda in by_url.items() if url not in existing
+    ]
+    if not rows:
+        return []
+
+    # Executed as a batched multi-row INSERT (SQLAlchemy insertmanyvalues)
+    db.session.execute(_insert_ignore_duplicates(), rows)
+
+    # Look up ids for the rows we just wrote
+    ids = dict(
+        db.session.query(MeetingAgenda.original_url, MeetingAgenda.id)
+        .filter(MeetingAgenda.original_url.in_([row['original_url'] for row in rows]))
+    )
+
+    inserted = []
+    for row in rows:
+        if row['original_url'] in ids:
+            inserted.append(dict(by_url[row['original_url']], id=ids[row['original_url']]))
+    index_agendas([agenda['id'] for agenda in inserted])
+
+    logger.info(f"Inserted {len(inserted)} new agendas, skipped {len(batch) - len(inserted)} existing or duplicate")
+    return inserted
+
+def update_changed_agendas(agendas: Iterable[Dict]) -> List[Dict]:
+    """
+    Update stored agendas whose content fingerprint has changed
+
+    Changed rows get the new content and fingerprint and are marked
+    unprocessed, so they are summarized again; the old summary stays visible
+    until then. Records without content (e.g. a failed fetch) or marked
+    extraction_failed (placeholder text) never overwrite stored content.
+    Rows stored before fingerprints existed are compared against their
+    stored text and only get their fingerprint filled in if it matches.
+    Changed rows are re-indexed for search. The caller is responsible for
+    committing.
+
+    Returns:
+        The changed records, each with its row 'id' and the number of
+        'changed_sections' not present in the stored version
+    """
+    by_url = {
+        agenda['original_url']: agenda for agenda in agendas
+        if agenda.get('original_url') and normalize_content(agenda.get('agenda_content'))
+        and not agenda.get('extraction_failed')
+    }
+    if not by_url:
+        return []
+
+    stored = db.session.query(
+        MeetingAgenda.id, MeetingAgenda.original_url, MeetingAgenda.content_hash, MeetingAgenda.section_hashes
+    ).filter(MeetingAgenda.original_url.in_(list(by_url))).all()
+
+    # Fingerprint rows that predate the fingerprint columns
+    legacy_ids = [agenda_id for agenda_id, _, content_hash, _ in stored if content_hash is None]
+    legacy = {}
+    if legacy_ids:
+        for agenda_id, content in db.session.query(MeetingAgenda.id, MeetingAgenda.agenda_content).filter(
+                MeetingAgenda.id.in_(legacy_ids)):
+            legacy[agenda_id] = content_fingerprint(content)
+
+    changes = []
+    backfilled = []
+    changed = []
+    now = datetime.utcnow()
+
+    for agenda_id, url, old_hash, old_sections in stored:
+        content = by_url[url]['agenda_content']
+        content_hash, section_hashes = content_fingerprint(content)
+        if agenda_id in legacy:
+            old_hash, old_section_list = legacy[agenda_id]
+            if old_hash == content_hash:
+                backfilled.append({'id': agenda_id, 'content_hash': content_hash,
+                                   'section_hashes': json.dumps(section_hashes)})
+                continue
+        else:
+            old_section_list = json.loads(old_sections or '[]')
+
+        if content_hash == old_hash:
+            continue
+
+        changes.append({
+            'id': agenda_id,
+            'agenda_content': content,
+            'content_hash': content_hash,
+            'section_hashes': json.dumps(section_hashes),
+            'is_processed': False,
+            'updated_at': now
+        })
+        changed.append(dict(
+            by_url[url], id=agenda_id,
+            changed_sections=len(set(section_hashes) - set(old_section_list))
+        ))
+
+    # Bulk UPDATE ... WHERE id = ? per row (SQLAlchemy ORM bulk update by primary key)
+    if changes:
+        db.session.execute(update(MeetingAgenda), changes)
+        index_agendas([change['id'] for change in changes])
+    if backfilled:
+        db.session.execute(update(MeetingAgenda), backfilled)
+
+    if changed:
+        logger.info(f"Updated {len(changed)} agendas whose content changed")
+    return changed
+
+def iter_batches(items: Iterable, batch_size: int, max_wait: float) -> Iterator[List]:
+    """
+    Group a stream into lists of at most batch_size items
+
+    A batch is also flushed when the next item arrives more than max_wait
+    seconds after the batch was started.
+    """
+    batch = []
+    started = None
+
+    for item in items:
+        if not batch:
+            started = time.monotonic()
+        batch.append(item)
+
+        if len(batch) >= batch_size or time.monotonic() - started >= max_wait:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+def insert_agenda_stream(agendas: Iterable[Dict], batch_size: int = STREAM_BATCH_SIZE,
+                         max_wait: float = STREAM_FLUSH_SECONDS) -> Iterator[List[Dict]]:
+    """
+    Insert agendas from a stream in bounded batches
+
+    Yields the newly inserted records of each batch, so the caller can commit
+    and hand them on before the rest of the stream has been scraped.
+    """
+    for batch in iter_batches(agendas, batch_size, max_wait):
+        yield bulk_insert_agendas(batch, batch_size)
+
+def refresh_agenda_stream(agendas: Iterable[Dict], batch_size: int = STREAM_BATCH_SIZE,
+                          max_wait: float = STREAM_FLUSH_SECONDS) -> Iterator[Tuple[List[Dict], List[Dict]]]:
+    """
+    Like insert_agenda_stream, but agendas that are already stored are
+    updated if their content changed (see update_changed_agendas)
+
+    Yields (inserted, changed) records for each batch.
+    """
+    for batch in iter_batches(agendas, batch_size, max_wait):
+        changed = update_changed_agendas(batch)
+        yield bulk_insert_agendas(batch, batch_size), changed
@@ -6,15 +6,25 @@ CLI management script for Williamsburg News Application
 import click
 import os
 import sys
-from datetime import datetime
+import time
+import asyncio
+from datetime import datetime, date, timedelta
 
 # Add the app directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
 from models import db, MeetingAgenda, ScrapingLog
-from scrapers import scrape_all_sources
+from scrapers import iter_scraped_agendas
 from ai_service import AIService
+from tasks import log_source_result, plan_backfill, run_backfill_unit, dispatch_backfill, store_summary
+from ingest import bulk_insert_agendas, refresh_agenda_stream, REFRESH_DAYS
+from migrations import migrate_database
+from date_parsing import parse_date
+from response_cache import bump_data_version
+from stats import meeting_counts, refresh_meeting_counters
+from search import index_agendas, rebuild_search_index, search_meetings
+from metrics import save_fetch_metrics, fetch_percentiles, PHASES, PERCENTILES
 
 @click.group()
 def cli():
@@ -26,9 +36,19 @@ def init_db():
     """Initialize the database with tables"""
     app = create_app()
     with app.app_context():
-        db.create_all()
+        migrate_database()
         click.echo("Database initialized successfully!")
 
+@cli.command()
+def migrate():
+    """Create missing tables and upgrade existing ones; run once per deploy before starting the app"""
+    app = create_app()
+    with app.app_context():
+        applied = migrate_database()
+        for change in applied:
+            click.echo(f"  {change}")
+        click.echo("Database schema is up to date." if not applied else f"Applied {len(applied)} schema changes.")
+
 @cli.command()
 def load_demo_data():
     """Load demo meeting data for testing"""
@@ -39,36 +59,25 @@ def load_demo_data():
         click.echo("Loading demo meeting data...")
         
         demo_meetings = get_demo_meetings()
-        added_count = 0
         
-        for meeting_data in demo_meetings:
-            # Check if already exists
-            existing = MeetingAgenda.query.filter_by(
-                original_url=meeting_data['original_url']
-            ).first()
-            
-            if existing:
-                click.echo(f"  Skipping existing: {meeting_data['meeting_title']}")
-                continue
-            
-            # Create new agenda
-            agenda = MeetingAgenda(
-                meeting_date=meeting_data['meeting_date'],
-                meeting_title=meeting_data['meeting_title'],
-                original_url=meeting_data['original_url'],
-                agenda_content=meeting_data['agenda_content'],
-                source=meeting_data['source']
-            )
-            
-            db.session.add(agenda)
-            added_count += 1
+        new_meetings = bulk_insert_agendas(demo_meetings)
+        added_count = len(new_meetings)
+        
+        for meeting_data in new_meetings:
             click.echo(f"  Added: {meeting_data['meeting_title']}")
+        if len(demo_meetings) > added_count:
+            click.echo(f"  Skipped {len(demo_meetings) - added_count} existing meetings")
         
+        refresh_meeting_counters()
         db.session.commit()
+        bump_data_version()
         click.echo(f"Demo data loaded! Added {added_count} meetings.")
 
 @cli.command()
-def scrape():
+@click.option('--full', is_flag=True, help='Re-fetch agendas that are already in the database')
+@click.option('--refresh-days', type=int, default=REFRESH_DAYS, show_default=True,
+              help='Re-fetch stored agendas for meetings within this many days')
+def scrape(full, refresh_days):
     """Manually trigger scraping of all sources"""
     app = create_app()
     with app.app_context():
@@ -84,36 +93,38 @@ def scrape():
         db.session.commit()
         
         try:
-            results = scrape_all_sources()
-            total_scraped = 0
+            known_urls = None if full else MeetingAgenda.known_urls(before=date.today() - timedelta(days=refresh_days))
+            results = {}
+            added = {}
+            updated = 0
+            
+            # Agendas are committed in batches as the scrapers produce them;
+            # re-fetched agendas are updated only if their content changed
+            for new_agendas, changed_agendas in refresh_agenda_stream(iter_scraped_agendas(known_urls=known_urls, results=results)):
+                db.session.commit()
+                if new_agendas or changed_agendas:
+                    bump_data_version()
+                for agenda_data in new_agendas:
+                    added[agenda_data['source']] = added.get(agenda_data['source'], 0) + 1
+                    click.echo(f"  Added: {agenda_data['meeting_title']} ({agenda_data['source']})")
+                for agenda_data in changed_agendas:
+                    updated += 1
+                    click.echo(f"  Updated: {agenda_data['meeting_title']} ({agenda_data['source']}, "
+                               f"{agenda_data['changed_sections']} changed sections)")
             
-            for source, agendas in results.items():
-                click.echo(f"Processing {len(agendas)} agendas from {source}...")
+            for source, result in results.items():
+                source_scraped = added.get(source, 0)
+                click.echo(f"Processed {result['count']} agendas from {source} "
+                           f"({result['status']}, {result['duration'] or 0:.1f}s)")
+                if result['count'] > source_scraped:
+                    click.echo(f"  {result['count'] - source_scraped} agendas were already stored")
                 
-                for agenda_data in agendas:
-                    # Check if already exists
-                    existing = MeetingAgenda.query.filter_by(
-                        original_url=agenda_data['original_url']
-                    ).first()
-                    
-                    if existing:
-                        click.echo(f"  Skipping existing: {agenda_data['meeting_title']}")
-                        continue
-                    
-                    # Create new agenda
-                    agenda = MeetingAgenda(
-                        meeting_date=agenda_data['meeting_date'],
-                        meeting_title=agenda_data['meeting_title'],
-                        original_url=agenda_data['original_url'],
-                        agenda_content=agenda_data['agenda_content'],
-                        source=agenda_data['source']
-                    )
-                    
-                    db.session.add(agenda)
-                    total_scraped += 1
-                    click.echo(f"  Added: {agenda_data['meeting_title']}")
+                source_log = log_source_result(result, source_scraped)
+                save_fetch_metrics(result['metrics'], source_log)
             
+            refresh_meeting_counters()
             db.session.commit()
+            total_scraped = sum(added.values())
             
             # Update log
             log.status = 'success'
@@ -121,7 +132,9 @@ def scrape():
             log.completed_at = datetime.utcnow()
             db.session.commit()
             
-            click.echo(f"Scraping completed! Added {total_scraped} new agendas.")
+            click.echo(f"Scraping completed! Added {total_scraped} new agendas, updated {updated} changed agendas.")
+            if updated:
+                click.echo("Run generate-summaries to re-summarize the updated agendas.")
             
         except Exception as e:
             log.status = 'error'
@@ -131,7 +144,53 @@ def scrape():
             click.echo(f"Error during scraping: {e}")
 
 @cli.command()
-def generate_summaries():
+@click.option('--since', required=True, help='Earliest meeting date to load (YYYY or YYYY-MM-DD)')
+@click.option('--source', 'sources', multiple=True, help='Only backfill this source (repeatable)')
+@click.option('--local', is_flag=True, help='Run here instead of queueing Celery tasks')
+def backfill(since, sources, local):
+    """Load historical agendas, resuming from saved checkpoints"""
+    since_date = None
+    for date_format in ('%Y', '%Y-%m-%d'):
+        try:
+            since_date = datetime.strptime(since, date_format).date()
+            break
+        except ValueError:
+            continue
+    if since_date is None:
+        click.echo(f"Error: --since must be YYYY or YYYY-MM-DD, got {since}")
+        return
+    
+    app = create_app()
+    with app.app_context():
+        checkpoints = plan_backfill(since_date, sources)
+        if not checkpoints:
+            click.echo("Nothing to backfill - every unit is already done.")
+            return
+        
+        if not local:
+            dispatch_backfill(checkpoint.id for checkpoint in checkpoints)
+            click.echo(f"Queued {len(checkpoints)} backfill tasks since {since_date}.")
+            return
+        
+        total_added = 0
+        for checkpoint in checkpoints:
+            click.echo(f"Backfilling {checkpoint.source} {checkpoint.unit} "
+                       f"from {checkpoint.cursor or 'the start'}...")
+            try:
+                added = run_backfill_unit(checkpoint.id, queue_summaries=False)
+            except Exception as e:
+                click.echo(f"  Error: {e} - run the command again to resume")
+                continue
+            click.echo(f"  Added {added} agendas")
+            total_added += added
+        
+        click.echo(f"Backfill completed! Added {total_added} agendas. "
+                   f"Run generate-summaries to summarize them.")
+
+@cli.command()
+@click.option('--concurrency', type=int, default=None, help='Concurrent OpenAI requests (default: AI_MAX_CONCURRENCY)')
+@click.option('--chunk-size', type=int, default=50, help='Agendas to summarize between commits')
+def generate_summaries(concurrency, chunk_size):
     """Generate AI summaries for agendas that don't have them"""
     app = create_app()
     with app.app_context():
@@ -142,10 +201,7 @@ def generate_summaries():
         click.echo("Generating AI summaries...")
         
         # Find unprocessed agendas
-        unprocessed = MeetingAgenda.query.filter(
-            MeetingAgenda.is_processed == False,
-            MeetingAgenda.agenda_content.isnot(None)
-        ).all()
+        unprocessed = MeetingAgenda.unprocessed().all()
         
         if not unprocessed:
             click.echo("No agendas need processing.")
@@ -154,48 +210,92 @@ def generate_summaries():
         ai_service = AIService()
         processed_count = 0
         
-        for agenda in unprocessed:
-            if len(agenda.agenda_content.strip()) < 50:
-                continue
+        agendas = [
+            agenda for agenda in unprocessed
+            if len(agenda.agenda_content.strip()) >= 50
+        ]
+        
+        # Summarize concurrently, committing after each chunk
+        for start in range(0, len(agendas), chunk_size):
+            chunk = agendas[start:start + chunk_size]
+            click.echo(f"Processing {start + 1}-{start + len(chunk)} of {len(agendas)}...")
             
             try:
-                click.echo(f"Processing: {agenda.meeting_title}")
-                
-                ai_result = ai_service.generate_summary(
-                    agenda.agenda_content,
-                    agenda.meeting_title,
-                    str(agenda.meeting_date)
-                )
-                
-                agenda.ai_summary = ai_result['summary']
-                agenda.ai_highlights = ai_result['highlights']
-                agenda.summary_generated_at = datetime.utcnow()
-                agenda.is_processed = True
-                
-                processed_count += 1
-                
+                results = asyncio.run(ai_service.generate_summaries_async([
+                    {
+                        'agenda_content': agenda.agenda_content,
+                        'meeting_title': agenda.meeting_title,
+                        'meeting_date': agenda.meeting_date
+                    }
+                    for agenda in chunk
+                ], max_concurrency=concurrency))
             except Exception as e:
-                click.echo(f"Error processing {agenda.meeting_title}: {e}")
+                click.echo(f"Error processing chunk: {e}")
                 continue
+            
+            for agenda, ai_result in zip(chunk, results):
+                if store_summary(agenda, ai_result):
+                    processed_count += 1
+                else:
+                    click.echo(f"Incomplete summary for agenda {agenda.id}, left unprocessed for a retry")
+            
+            index_agendas([agenda.id for agenda in chunk])
+            db.session.commit()
+            bump_data_version()
         
+        refresh_meeting_counters()
         db.session.commit()
         click.echo(f"Generated summaries for {processed_count} agendas.")
+        if ai_service.cache:
+            stats = ai_service.cache.stats()
+            click.echo(f"Summary cache: {stats['hits']} hits, {stats['misses']} misses "
+                       f"({stats['hit_rate']:.0%} hit rate)")
 
 @cli.command()
 def stats():
     """Show database statistics"""
     app = create_app()
     with app.app_context():
-        total_meetings = MeetingAgenda.query.count()
-        processed_meetings = MeetingAgenda.query.filter(MeetingAgenda.is_processed == True).count()
-        williamsburg_count = MeetingAgenda.query.filter(MeetingAgenda.source == 'williamsburg').count()
-        jamescity_count = MeetingAgenda.query.filter(MeetingAgenda.source == 'jamescity').count()
+        counts = meeting_counts()
         
         click.echo(f"Database Statistics:")
-        click.echo(f"  Total Meetings: {total_meetings}")
-        click.echo(f"  Processed: {processed_meetings}")
-        click.echo(f"  Williamsburg: {williamsburg_count}")
-        click.echo(f"  James City: {jamescity_count}")
+        click.echo(f"  Total Meetings: {counts['total_meetings']}")
+        click.echo(f"  Processed: {counts['processed_meetings']}")
+        for source in counts['sources']:
+            click.echo(f"  {source['label']}: {source['total']} ({source['processed']} processed)")
+        
+        timings = fetch_percentiles()
+        if timings:
+            click.echo(f"Request Timings (ms, p50/p95/p99):")
+            for entry in timings:
+                phases = '  '.join(
+                    f"{phase[:-3]} " + '/'.join('-' if entry[phase][pct] is None else f"{entry[phase][pct]:.0f}" for pct in PERCENTILES)
+                    for phase in PHASES
+                )
+                click.echo(f"  {entry['source']} {entry['kind']} ({entry['count']}): {phases}")
+
+@cli.command()
+def reindex_search():
+    """Rebuild the full-text search index from every stored agenda"""
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            indexed = rebuild_search_index(connection)
+        click.echo(f"Indexed {indexed} agendas for search in {time.perf_counter() - started:.1f}s.")
+
+@cli.command()
+@click.argument('query')
+@click.option('--limit', type=int, default=10, show_default=True, help='Results to show')
+def search(query, limit):
+    """Search meeting titles, agendas and summaries"""
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        results = search_meetings(query, limit=limit)
+        click.echo(f"{len(results)} results in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for result in results:
+            click.echo(f"  [{result['score']:.2f}] {result['meeting_date']} {result['meeting_title']} (#{result['id']})")
 
 @cli.command()
 def test_ai():
@@ -213,5 +313,94 @@ def test_ai():
     except Exception as e:
         click.echo(f"Error testing AI service: {e}")
 
+# Date cells and document titles as they appear on the civicweb and James City sites
+DATE_BENCHMARK_CORPUS = [
+    '1/14/2025', '01/28/2025', '2/11/2025', '12-02-2024', 'Jan 14, 2025', 'February 11, 2025',
+    'March 25, 2025 6:30 PM', 'Tuesday, April 8, 2025', '2025-05-13',
+    'Board of Supervisors Regular Meeting Agenda - January 14, 2025',
+    'Board of Supervisors Business Meeting Agenda 01-28-2025.pdf',
+    '2025-02-11 Board of Supervisors Work Session Agenda',
+    'Planning Commission Agenda 2/5/2025', 'Budget Work Session Packet (Mar 4 2025)',
+    'Agenda Sept 9, 2025', 'FY2026 Proposed Budget', 'Board of Supervisors Annual Organizational Meeting'
+]
+
+@cli.command()
+@click.option('--iterations', type=int, default=20000, show_default=True, help='Parses per measurement')
+@click.option('--from-db', is_flag=True, help='Add stored meeting titles to the corpus')
+def benchmark_dates(iterations, from_db):
+    """Time date parsing over a corpus of listing cells and document titles"""
+    corpus = list(DATE_BENCHMARK_CORPUS)
+    if from_db:
+        app = create_app()
+        with app.app_context():
+            corpus.extend(title for (title,) in db.session.query(MeetingAgenda.meeting_title).limit(5000))
+    
+    samples = [corpus[i % len(corpus)] for i in range(iterations)]
+    parsed = sum(1 for text in corpus if parse_date.__wrapped__(text))
+    click.echo(f"Corpus: {len(corpus)} strings, {parsed} with a date")
+    
+    started = time.perf_counter()
+    for text in samples:
+        parse_date.__wrapped__(text)
+    uncached = time.perf_counter() - started
+    
+    parse_date.cache_clear()
+    started = time.perf_counter()
+    for text in samples:
+        parse_date(text)
+    cached = time.perf_counter() - started
+    
+    click.echo(f"  Uncached: {uncached / iterations * 1e6:.2f} us/parse")
+    click.echo(f"  Memoized: {cached / iterations * 1e6:.2f} us/parse ({parse_date.cache_info().hits} cache hits)")
+
+@cli.command()
+@click.option('--rows', type=int, default=100000, show_default=True, help='Synthetic agendas to load')
+@click.option('--database-url', default=None,
+              help='Empty scratch database to load them into (default: a temporary SQLite file)')
+@click.option('--verbose', is_flag=True, help='Show every query and plan, not just the problems')
+def check_query_plans(rows, database_url, verbose):
+    """EXPLAIN the queries behind each meeting route on a synthetic table"""
+    import tempfile
+    import response_cache
+    from query_plans import load_synthetic_agendas, route_checks, check_plans
+    
+    # Pages rendered from synthetic data must not reach the shared response cache
+    response_cache.RESPONSE_CACHE_URL = 'none'
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = database_url or f"sqlite:///{os.path.join(tmp, 'query_plans.db')}"
+        app = create_app()
+        with app.app_context():
+            migrate_database()
+            if MeetingAgenda.query.first() is not None:
+                raise click.ClickException("The database already has agendas; use an empty scratch database.")
+            
+            click.echo(f"Loading {rows} synthetic agendas...")
+            load_synthetic_agendas(rows)
+            db.session.commit()
+            if db.engine.dialect.name == 'postgresql':
+                db.session.execute(db.text('ANALYZE meeting_agendas'))
+                db.session.commit()
+            
+            results = check_plans(route_checks(app))
+            failed = [result for result in results if result['problems']]
+            for result in results:
+                if not (verbose or result['problems']):
+                    continue
+                click.echo(f"{'FAIL' if result['problems'] else 'ok  '} {result['check']}: {result['sql']}")
+                for step in result['plan']:
+                    click.echo(f"       {step}")
+                for problem in result['problems']:
+                    click.echo(f"     ! {problem}")
+            
+            if database_url:
+                MeetingAgenda.query.delete()
+                db.session.commit()
+    
+    checks = len({result['check'] for result in results})
+    if failed:
+        raise click.ClickException(f"{len(failed)} of {len(results)} queries are not served by their expected index.")
+    click.echo(f"All {len(results)} queries from {checks} checks use their expected index.")
+
 if __name__ == '__main__':
     cli()
@@ -0,0 +1,113 @@
+"""
+Per-request scrape metrics: persistence and percentile summaries
+"""
+
+import os
+import math
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+
+from models import db, FetchMetric, ScrapingLog
+
+logger = logging.getLogger(__name__)
+
+# Metrics older than this are deleted as new ones are saved
+METRICS_RETENTION_DAYS = int(os.getenv('METRICS_RETENTION_DAYS', '30'))
+
+# Period summarized on the admin dashboard
+METRICS_WINDOW_DAYS = int(os.getenv('METRICS_WINDOW_DAYS', '7'))
+
+# Seconds the dashboard's percentile table is cached; metrics are saved on
+# every scrape, even when no agenda changed and the data version stays put
+METRICS_CACHE_SECONDS = int(os.getenv('METRICS_CACHE_SECONDS', '60'))
+
+METRIC_FIELDS = ('source', 'kind', 'url', 'status_code', 'cache_hit', 'bytes',
+                 'ttfb_ms', 'download_ms', 'parse_ms', 'total_ms', 'error', 'fetched_at')
+
+# Timing columns summarized by fetch_percentiles
+PHASES = ('ttfb_ms', 'download_ms', 'parse_ms', 'total_ms')
+PERCENTILES = (50, 95, 99)
+
+def save_fetch_metrics(metrics: Iterable[Dict], log: Optional[ScrapingLog] = None) -> int:
+    """
+    Bulk insert request metrics, optionally tied to a scrape run's log row
+
+    Also prunes metrics past METRICS_RETENTION_DAYS. The caller is
+    responsible for committing.
+
+    Returns:
+        Number of metrics saved
+    """
+    log_id = None
+    if log is not None:
+        db.session.flush()  # Assign the log's id
+        log_id = log.id
+
+    rows = [dict({field: metric.get(field) for field in METRIC_FIELDS}, log_id=log_id) for metric in metrics]
+    if rows:
+        for row in rows:
+            if row['url']:
+                row['url'] = row['url'][:1000]
+            row['fetched_at'] = row['fetched_at'] or datetime.utcnow()
+        db.session.execute(insert(FetchMetric), rows)
+
+    cutoff = datetime.utcnow() - timedelta(days=METRICS_RETENTION_DAYS)
+    FetchMetric.query.filter(FetchMetric.fetched_at < cutoff).delete(synchronize_session=False)
+    return len(rows)
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+def fetch_percentiles(days: int = METRICS_WINDOW_DAYS) -> List[Dict]:
+    """
+    p50/p95/p99 of each timing phase per source and kind over the last few days
+
+    Returns:
+        One dictionary per (source, kind) with 'source', 'kind', 'count',
+        'cache_hit_rate', 'errors', 'bytes' and a {50: .., 95: .., 99: ..}
+        dictionary for each entry of PHASES
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    query = db.session.query(
+        FetchMetric.source, FetchMetric.kind, FetchMetric.cache_hit, FetchMetric.bytes,
+        FetchMetric.error, *[getattr(FetchMetric, phase) for phase in PHASES]
+    ).filter(FetchMetric.fetched_at >= since)
+
+    groups = {}
+    for row in query.yield_per(1000):
+        source, kind, cache_hit, size, error = row[:5]
+        group = groups.setdefault((source, kind), {
+            'count': 0, 'cache_hits': 0, 'errors': 0, 'bytes': 0,
+            'values': {phase: [] for phase in PHASES}
+        })
+        group['count'] += 1
+        group['cache_hits'] += 1 if cache_hit else 0
+        group['errors'] += 1 if error else 0
+        group['bytes'] += size or 0
+        for phase, value in zip(PHASES, row[5:]):
+            if value is not None:
+                group['values'][phase].append(value)
+
+    summary = []
+    for (source, kind), group in sorted(groups.items()):
+        entry = {
+            'source': source,
+            'kind': kind,
+            'count': group['count'],
+            'cache_hit_rate': group['cache_hits'] / group['count'],
+            'errors': group['errors'],
+            'bytes': group['bytes']
+        }
+        for phase, values in group['values'].items():
+            values.sort()
+            entry[phase] = {pct: percentile(values, pct) for pct in PERCENTILES}
+        summary.append(entry)
+
+    return summary
@@ -0,0 +1,149 @@
+"""
+In-place schema upgrades for existing databases
+
+db.create_all() only creates missing tables, so columns and indexes added
+to a model after its table exists are added here. Column and index changes
+check the live schema first; other steps run once and are recorded in
+schema_migrations. Both make upgrade_schema safe to run again.
+
+migrate_database() runs once per deploy from `manage.py migrate`, before the
+web and worker processes start; the app itself never changes the schema, so
+several workers booting at once can't race on the same DDL.
+"""
+
+import json
+import logging
+from typing import List
+
+from sqlalchemy import bindparam, inspect, text
+
+from models import db
+from search import rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+# (table, column, column type) added after the table was first created
+ADDED_COLUMNS = (
+    ('meeting_agendas', 'content_hash', 'VARCHAR(64)'),
+    ('meeting_agendas', 'section_hashes', 'TEXT'),
+)
+
+# (table, index) replaced by an index declared on the model
+DROPPED_INDEXES = (
+    ('meeting_agendas', 'ix_meeting_agendas_meeting_date'),  # Now ix_meeting_agendas_date_id
+    ('meeting_agendas', 'ix_meeting_agendas_unprocessed'),  # Unused, see MeetingAgenda.__table_args__
+)
+
+UPDATE_BATCH_SIZE = 500
+
+def _highlights_to_json(connection):
+    """
+    Make ai_highlights a JSON column
+
+    Values that are not valid JSON are cleared, since the JSON column type
+    can't load them. PostgreSQL then converts the column to JSONB; SQLite
+    keeps storing JSON as text, so nothing else changes there.
+    """
+    rows = connection.execution_options(stream_results=True).execute(
+        text('SELECT id, ai_highlights FROM meeting_agendas WHERE ai_highlights IS NOT NULL')
+    )
+    invalid = []
+    for agenda_id, raw in rows:
+        if not isinstance(raw, str):
+            continue  # Already a JSON column
+        try:
+            json.loads(raw)
+        except ValueError:
+            invalid.append(agenda_id)
+
+    clear = text('UPDATE meeting_agendas SET ai_highlights = NULL WHERE id IN :ids').bindparams(
+        bindparam('ids', expanding=True)
+    )
+    for start in range(0, len(invalid), UPDATE_BATCH_SIZE):
+        connection.execute(clear, {'ids': invalid[start:start + UPDATE_BATCH_SIZE]})
+    if invalid:
+        logger.info(f"Cleared {len(invalid)} highlights that were not valid JSON")
+
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text(
+            'ALTER TABLE meeting_agendas ALTER COLUMN ai_highlights TYPE JSONB USING ai_highlights::jsonb'
+        ))
+
+def _search_index(connection):
+    """Create the full-text search index and fill it from the stored agendas"""
+    indexed = rebuild_search_index(connection)
+    logger.info(f"Indexed {indexed} agendas for search")
+
+# (name, function) pairs, each run once, in order
+DATA_MIGRATIONS = (
+    ('0001_highlights_json', _highlights_to_json),
+    ('0002_search_index', _search_index),
+)
+
+def upgrade_schema() -> List[str]:
+    """
+    Add missing columns and indexes to existing tables and run pending migrations
+
+    Returns:
+        A description of each change that was applied
+    """
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    columns = {}
+    applied = []
+
+    with db.engine.begin() as connection:
+        for table, column, column_type in ADDED_COLUMNS:
+            if table not in tables:
+                continue  # create_all builds it with every column
+            if table not in columns:
+                columns[table] = {info['name'] for info in inspector.get_columns(table)}
+            if column in columns[table]:
+                continue
+
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}'))
+            columns[table].add(column)
+            applied.append(f"Added column {table}.{column}")
+
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            existing = {info['name'] for info in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    index.create(connection)
+                    applied.append(f"Created index {index.name}")
+
+        for table, index_name in DROPPED_INDEXES:
+            if table in tables and index_name in {info['name'] for info in inspector.get_indexes(table)}:
+                connection.execute(text(f'DROP INDEX {index_name}'))
+                applied.append(f"Dropped index {index_name}")
+
+        connection.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP)'
+        ))
+        done = {name for (name,) in connection.execute(text('SELECT name FROM schema_migrations'))}
+        for name, migrate in DATA_MIGRATIONS:
+            if name in done:
+                continue
+
+            migrate(connection)
+            connection.execute(
+                text('INSERT INTO schema_migrations (name, applied_at) VALUES (:name, CURRENT_TIMESTAMP)'),
+                {'name': name}
+            )
+            applied.append(f"Applied migration {name}")
+
+    for change in applied:
+        logger.info(change)
+    return applied
+
+def migrate_database() -> List[str]:
+    """
+    Create missing tables, then upgrade existing ones (see upgrade_schema)
+
+    Returns:
+        A description of each change that was applied to existing tables
+    """
+    db.create_all()
+    return upgrade_schema()
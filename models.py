@@ -3,17 +3,44 @@ Database models for Williamsburg News Application
 """
 
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
-from typing import Optional
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import load_only
+from sqlalchemy.types import JSON, TypeDecorator
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+import json
 
 db = SQLAlchemy()
 
+class JSONValue(TypeDecorator):
+    """
+    JSON column (JSONB on PostgreSQL) that also accepts JSON-encoded strings
+    
+    AIService returns highlights as a JSON string; they are decoded once on
+    write so the database holds real JSON. None is stored as SQL NULL.
+    """
+    impl = JSON
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB(none_as_null=True))
+        return dialect.type_descriptor(JSON(none_as_null=True))
+    
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return None
+        return value
+
 class MeetingAgenda(db.Model):
     """Model for storing meeting agendas and minutes"""
     __tablename__ = 'meeting_agendas'
     
     id = db.Column(db.Integer, primary_key=True)
-    meeting_date = db.Column(db.Date, nullable=False, index=True)
+    meeting_date = db.Column(db.Date, nullable=False)
     meeting_title = db.Column(db.String(500), nullable=False)
     original_url = db.Column(db.String(1000), nullable=False, unique=True)
     agenda_content = db.Column(db.Text)
@@ -21,33 +48,110 @@ class MeetingAgenda(db.Model):
     
     # AI-generated content
     ai_summary = db.Column(db.Text)
-    ai_highlights = db.Column(db.Text)  # JSON string of highlights
+    ai_highlights = db.Column(JSONValue)  # List of {'title', 'description'} dicts
     summary_generated_at = db.Column(db.DateTime)
     
+    # Content fingerprint (see ingest.content_fingerprint)
+    content_hash = db.Column(db.String(64))  # SHA-256 of the normalized agenda text
+    section_hashes = db.Column(db.Text)  # JSON list of per-section hashes
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_processed = db.Column(db.Boolean, default=False)
     
+    # Indexes follow the query shapes (see manage.py check-query-plans); all
+    # listings are ordered by (meeting_date, id) descending. The summary
+    # backlog reads is_processed = false newest first, which is a range of
+    # ix_meeting_agendas_processed_date; a partial index on unprocessed rows
+    # duplicated that range and the planner never chose it over this one.
+    __table_args__ = (
+        db.Index('ix_meeting_agendas_date_id', meeting_date.desc(), id.desc()),  # /meetings, /api/meetings
+        db.Index('ix_meeting_agendas_source_date_id', source, meeting_date.desc(), id.desc()),  # ?source=
+        db.Index('ix_meeting_agendas_processed_date', is_processed, meeting_date),  # Highlights, summary backlog
+    )
+    
+    # Fields of to_dict, in output order
+    FIELDS = ('id', 'meeting_date', 'meeting_title', 'original_url', 'agenda_content', 'source',
+              'ai_summary', 'ai_highlights', 'summary_generated_at', 'created_at', 'updated_at', 'is_processed')
+    
+    # Default fields for listings; the large agenda_content and ai_summary
+    # text is only served by the single-meeting endpoint unless requested
+    LIST_FIELDS = ('id', 'meeting_date', 'meeting_title', 'original_url', 'source',
+                   'ai_highlights', 'summary_generated_at', 'is_processed')
+    
+    FIELD_ALIASES = {'highlights': 'ai_highlights', 'summary': 'ai_summary', 'content': 'agenda_content'}
+    
     def __repr__(self):
         return f'<MeetingAgenda {self.meeting_title} - {self.meeting_date}>'
     
-    def to_dict(self):
-        """Convert model to dictionary for JSON serialization"""
-        return {
-            'id': self.id,
-            'meeting_date': self.meeting_date.isoformat() if self.meeting_date else None,
-            'meeting_title': self.meeting_title,
-            'original_url': self.original_url,
-            'agenda_content': self.agenda_content,
-            'source': self.source,
-            'ai_summary': self.ai_summary,
-            'ai_highlights': self.ai_highlights,
-            'summary_generated_at': self.summary_generated_at.isoformat() if self.summary_generated_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'is_processed': self.is_processed
-        }
+    @property
+    def highlights(self) -> List[Dict]:
+        """Decoded highlights, or an empty list"""
+        return self.ai_highlights if isinstance(self.ai_highlights, list) else []
+    
+    @classmethod
+    def known_urls(cls, before: Optional[date] = None) -> set:
+        """
+        Set of every original_url already stored, for incremental scraping
+        
+        With before, only agendas for meetings before that date are included,
+        so more recent ones are fetched again and checked for changes.
+        """
+        query = db.session.query(cls.original_url)
+        if before is not None:
+            query = query.filter(cls.meeting_date < before)
+        return {url for (url,) in query}
+    
+    @classmethod
+    def unprocessed(cls):
+        """Query for agendas with content still waiting for a summary, newest meetings first"""
+        return cls.query.filter(
+            cls.is_processed == False,
+            cls.agenda_content.isnot(None)
+        ).order_by(cls.meeting_date.desc())
+    
+    @classmethod
+    def parse_fields(cls, spec: Optional[str]) -> Tuple[str, ...]:
+        """
+        Field names from a comma-separated ?fields= value, LIST_FIELDS if empty
+        
+        Raises:
+            ValueError: If a field is unknown
+        """
+        if not spec:
+            return cls.LIST_FIELDS
+        
+        fields = []
+        for name in spec.split(','):
+            name = name.strip()
+            if not name:
+                continue
+            field = cls.FIELD_ALIASES.get(name, name)
+            if field not in cls.FIELDS:
+                raise ValueError(f"Unknown field: {name}")
+            if field not in fields:
+                fields.append(field)
+        return tuple(fields) or cls.LIST_FIELDS
+    
+    @classmethod
+    def load_only_fields(cls, fields: Tuple[str, ...]):
+        """Query option loading just the columns behind fields (plus the pagination key)"""
+        columns = {'meeting_date', *fields} - {'id'}
+        return load_only(*[getattr(cls, name) for name in cls.FIELDS if name in columns])
+    
+    def to_dict(self, fields: Optional[Tuple[str, ...]] = None):
+        """
+        Convert model to dictionary for JSON serialization
+        
+        Only the given fields are read, so rows loaded with load_only_fields
+        are serialized without loading the deferred columns.
+        """
+        data = {}
+        for field in fields or self.FIELDS:
+            value = getattr(self, field)
+            data[field] = value.isoformat() if isinstance(value, (date, datetime)) else value
+        return data
 
 class ScrapingLog(db.Model):
     """Model for tracking scraping operations"""
@@ -63,3 +167,60 @@ class ScrapingLog(db.Model):
     
     def __repr__(self):
         return f'<ScrapingLog {self.source} - {self.status}>'
+
+class BackfillCheckpoint(db.Model):
+    """Progress of a historical backfill through one slice of a source's archive"""
+    __tablename__ = 'backfill_checkpoints'
+    __table_args__ = (db.UniqueConstraint('source', 'unit', 'since'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(100), nullable=False)
+    unit = db.Column(db.String(1000), nullable=False)  # e.g. a meeting type listing URL
+    since = db.Column(db.Date, nullable=False)
+    cursor = db.Column(db.String(100))  # Last page completed; None before the first
+    status = db.Column(db.String(50), nullable=False, default='pending')  # 'pending', 'running', 'done', 'error'
+    items_scraped = db.Column(db.Integer, default=0)
+    error_message = db.Column(db.Text)
+    started_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<BackfillCheckpoint {self.source} {self.unit} - {self.status} @ {self.cursor}>'
+
+class FetchMetric(db.Model):
+    """Timing of a single scraper request or AI summary, for finding slow phases"""
+    __tablename__ = 'fetch_metrics'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    log_id = db.Column(db.Integer, db.ForeignKey('scraping_logs.id'), index=True)  # Scrape run, if any
+    source = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'page', 'document' or 'summary'
+    url = db.Column(db.String(1000))
+    status_code = db.Column(db.Integer)
+    cache_hit = db.Column(db.Boolean, default=False)
+    bytes = db.Column(db.Integer)
+    
+    # Phase timings in milliseconds
+    ttfb_ms = db.Column(db.Float)  # Request sent to headers received, including connection setup
+    download_ms = db.Column(db.Float)  # Reading the body
+    parse_ms = db.Column(db.Float)  # HTML parsing or document text extraction
+    total_ms = db.Column(db.Float)
+    
+    error = db.Column(db.String(500))
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<FetchMetric {self.source} {self.kind} {self.url} - {self.total_ms}ms>'
+
+class MeetingCounter(db.Model):
+    """Materialized meeting counts per source and processing state (see stats.py)"""
+    __tablename__ = 'meeting_counters'
+    
+    source = db.Column(db.String(100), primary_key=True)
+    is_processed = db.Column(db.Boolean, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<MeetingCounter {self.source} processed={self.is_processed}: {self.count}>'
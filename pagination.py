@@ -0,0 +1,87 @@
+"""
+Keyset pagination for meeting listings
+
+Pages are ordered by (meeting_date, id) descending and continue from an
+opaque cursor holding the key of the last (or first) row shown, so fetching
+a deep page costs the same as the first one: no OFFSET, and no COUNT(*)
+unless asked for.
+"""
+
+import json
+import base64
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from models import MeetingAgenda
+
+Cursor = Tuple[date, int]
+
+def encode_cursor(meeting: MeetingAgenda) -> str:
+    """Opaque cursor pointing at a meeting's position in the listing"""
+    payload = json.dumps([meeting.meeting_date.isoformat(), meeting.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Key stored in a cursor from encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        meeting_date, meeting_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return date.fromisoformat(meeting_date), int(meeting_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+class KeysetPage:
+    """One page of meetings with cursors for the neighbouring pages"""
+
+    def __init__(self, items: List[MeetingAgenda], has_next: bool, has_prev: bool, total: Optional[int] = None):
+        self.items = items
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.total = total
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        return encode_cursor(self.items[-1]) if self.has_next and self.items else None
+
+    @property
+    def prev_cursor(self) -> Optional[str]:
+        return encode_cursor(self.items[0]) if self.has_prev and self.items else None
+
+def keyset_paginate(query, per_page: int, after: Optional[str] = None, before: Optional[str] = None,
+                    count: bool = False) -> KeysetPage:
+    """
+    Page through a MeetingAgenda query, newest meetings first
+
+    Args:
+        query: Filtered, unordered MeetingAgenda query
+        per_page: Meetings per page
+        after: Cursor of the last meeting on the previous page (next page)
+        before: Cursor of the first meeting on the following page (previous page)
+        count: Also count all matching meetings (one extra COUNT query)
+
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    key = tuple_(MeetingAgenda.meeting_date, MeetingAgenda.id)
+    total = query.order_by(None).count() if count else None
+
+    if before:
+        # Walk backwards from the cursor, then restore newest-first order
+        rows = (query.filter(key > tuple_(*decode_cursor(before)))
+                .order_by(MeetingAgenda.meeting_date.asc(), MeetingAgenda.id.asc())
+                .limit(per_page + 1).all())
+        items = rows[:per_page][::-1]
+        return KeysetPage(items, has_next=True, has_prev=len(rows) > per_page, total=total)
+
+    if after:
+        query = query.filter(key < tuple_(*decode_cursor(after)))
+    rows = (query.order_by(MeetingAgenda.meeting_date.desc(), MeetingAgenda.id.desc())
+            .limit(per_page + 1).all())
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_prev=bool(after), total=total)
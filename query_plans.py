@@ -0,0 +1,191 @@
+"""
+EXPLAIN checks for the queries behind the meeting pages and API
+
+Each check runs a route through the Flask test client (or a query directly)
+while the SQL it sends is captured. Every SELECT on a checked table is then
+explained, and plans that read the whole table, sort rows outside an index
+or don't use the index the check expects are reported. manage.py
+check-query-plans runs these checks on a synthetic table, so a query that
+stops matching the indexes in models.py shows up before a real table is
+large enough to notice.
+"""
+
+import re
+import contextlib
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, insert
+
+from models import db, MeetingAgenda
+from pagination import encode_cursor
+
+# Tables whose queries must be served by an index
+CHECKED_TABLES = ('meeting_agendas',)
+
+# Expected index of checks served by a primary key lookup
+PRIMARY_KEY = 'primary key'
+
+SYNTHETIC_SOURCES = ('williamsburg', 'jamescity')
+SYNTHETIC_BATCH_SIZE = 5000
+
+def load_synthetic_agendas(count: int) -> int:
+    """
+    Insert count made-up agendas spread over the last 30 years
+
+    Sources alternate and one agenda in twenty is left unprocessed, roughly
+    the shape of a long-running deployment. The caller is responsible for
+    committing.
+
+    Returns:
+        Number of agendas inserted
+    """
+    first_date = date.today() - timedelta(days=30 * 365)
+    highlights = [{'title': 'Synthetic item', 'description': 'Generated for query plan checks'}]
+
+    for start in range(0, count, SYNTHETIC_BATCH_SIZE):
+        rows = []
+        for i in range(start, min(start + SYNTHETIC_BATCH_SIZE, count)):
+            processed = i % 20 != 0
+            rows.append({
+                'meeting_date': first_date + timedelta(days=i * 30 * 365 // count),
+                'meeting_title': f'Synthetic Meeting {i}',
+                'original_url': f'https://example.invalid/agendas/{i}',
+                'agenda_content': f'Synthetic agenda {i}',
+                'source': SYNTHETIC_SOURCES[i % len(SYNTHETIC_SOURCES)],
+                'ai_summary': f'Synthetic summary {i}' if processed else None,
+                'ai_highlights': highlights if processed else None,
+                'is_processed': processed
+            })
+        db.session.execute(insert(MeetingAgenda), rows)
+    return count
+
+@contextlib.contextmanager
+def capture_statements():
+    """Collect the (statement, parameters) of every query run inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+def _checked_table(statement: str) -> bool:
+    return statement.lstrip().upper().startswith('SELECT') and any(
+        re.search(rf'\b{table}\b', statement) for table in CHECKED_TABLES
+    )
+
+def explain(statement: str, parameters) -> List[str]:
+    """The database's query plan for a statement, one line per step"""
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[-1] for row in rows]
+    return [row[0] for row in connection.exec_driver_sql(f'EXPLAIN {statement}', parameters)]
+
+def _uses_index(plan: List[str], dialect: str, index: str) -> bool:
+    if index == PRIMARY_KEY:
+        marker = 'INTEGER PRIMARY KEY' if dialect == 'sqlite' else '_pkey'
+    else:
+        marker = index
+    return any(marker in step for step in plan)
+
+def plan_problems(plan: List[str], dialect: str, expected_indexes: Tuple[str, ...] = ()) -> List[str]:
+    """
+    Steps of a plan that scan a checked table or sort outside an index, and
+    whether it uses none of expected_indexes (index names or PRIMARY_KEY)
+    """
+    problems = []
+    if expected_indexes and not any(_uses_index(plan, dialect, index) for index in expected_indexes):
+        problems.append(f"Uses none of {', '.join(expected_indexes)}")
+    for step in plan:
+        if dialect == 'sqlite':
+            scan = re.match(r'SCAN (?:TABLE )?(\w+)$', step.strip())
+            sort = 'USE TEMP B-TREE' in step
+        else:
+            scan = re.search(r'Seq Scan on (\w+)', step)
+            sort = re.match(r'\s*(?:->\s*)?Sort\b', step) is not None
+        if scan and scan.group(1) in CHECKED_TABLES:
+            problems.append(f"Full scan of {scan.group(1)}: {step.strip()}")
+        elif sort:
+            problems.append(f"Sort outside an index: {step.strip()}")
+    return problems
+
+def check_plans(checks: Dict[str, Tuple[Callable[[], object], Tuple[str, ...]]]) -> List[Dict]:
+    """
+    Run each check and explain the queries it sends to checked tables
+
+    Args:
+        checks: (function to run, indexes each query must use one of) by check name
+
+    Returns:
+        One dictionary per query with 'check', 'sql', 'plan' and 'problems'
+    """
+    dialect = db.engine.dialect.name
+    results = []
+    for name, (run, expected_indexes) in checks.items():
+        with capture_statements() as statements:
+            run()
+        queries = [(statement, parameters) for statement, parameters in statements if _checked_table(statement)]
+        if not queries:
+            results.append({'check': name, 'sql': None, 'plan': [], 'problems': ['No query on a checked table']})
+        for statement, parameters in queries:
+            plan = explain(statement, parameters)
+            results.append({
+                'check': name,
+                'sql': ' '.join(statement.split()),
+                'plan': plan,
+                'problems': plan_problems(plan, dialect, expected_indexes)
+            })
+    return results
+
+def _get(client, path: str) -> Callable[[], object]:
+    def run():
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+    return run
+
+def route_checks(app) -> Dict[str, Tuple[Callable[[], object], Tuple[str, ...]]]:
+    """
+    Checks for every route that queries meeting agendas, plus the summary
+    backlog, each with the index of models.py meant to serve it
+
+    Cursors and ids point into the middle of the table, so deep pages are
+    covered as well as first pages.
+    """
+    total = MeetingAgenda.query.count()
+    middle = MeetingAgenda.query.order_by(
+        MeetingAgenda.meeting_date.desc(), MeetingAgenda.id.desc()
+    ).offset(total // 2).first()
+    cursor = encode_cursor(middle)
+    source = middle.source
+    client = app.test_client()
+
+    by_date = ('ix_meeting_agendas_date_id',)
+    by_source = ('ix_meeting_agendas_source_date_id',)
+    by_processed = ('ix_meeting_agendas_processed_date',)
+    by_key = (PRIMARY_KEY,)
+    # Their unfiltered COUNT(*) may read whichever covering index is smallest
+    with_count = by_date + by_processed
+    paths: List[Tuple[str, str, Tuple[str, ...]]] = [
+        ('Homepage highlights', '/', by_processed),
+        ('Meetings, first page', '/meetings', by_date),
+        ('Meetings, deep page', f'/meetings?after={cursor}', by_date),
+        ('Meetings, previous page', f'/meetings?before={cursor}', by_date),
+        ('Meetings by source', f'/meetings?source={source}', by_source),
+        ('Meetings by source, deep page', f'/meetings?source={source}&after={cursor}', by_source),
+        ('Meeting detail', f'/meeting/{middle.id}', by_key),
+        ('API meetings', '/api/meetings', with_count),
+        ('API meetings, deep page', f'/api/meetings?after={cursor}&count=0', by_date),
+        ('API meetings by source', f'/api/meetings?source={source}', by_source),
+        ('API meetings, page number', '/api/meetings?page=50', with_count),
+        ('API meeting detail', f'/api/meeting/{middle.id}', by_key)
+    ]
+    checks = {name: (_get(client, path), indexes) for name, path, indexes in paths}
+    checks['Summary backlog'] = (lambda: MeetingAgenda.unprocessed().limit(10).all(), by_processed)
+    return checks
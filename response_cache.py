@@ -0,0 +1,261 @@
+"""
+Cache for rendered pages, API responses and page fragments
+
+Entries are keyed by route, request arguments and a data version. Tasks that
+commit agendas or summaries call bump_data_version(), which makes every
+cached entry stale at once, so no invalidation has to know which pages a
+change affects. Each process keeps an in-memory LRU; with RESPONSE_CACHE_URL
+set to a redis:// URL (the default when REDIS_URL is set), responses and the
+data version are shared through Redis as well, so one render serves every
+gunicorn worker.
+
+With the 'memory' backend the data version is still kept in Redis if
+REDIS_URL is set. Only without any Redis does it live in a small file, which
+works only if the web and worker processes share a disk; a warning is logged
+when the cache is opened that way.
+"""
+
+import os
+import time
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import current_app, g, make_response, request
+
+logger = logging.getLogger(__name__)
+
+# 'memory' (per-process only), 'redis://...' (shared) or 'none' to disable
+REDIS_URL = os.getenv('REDIS_URL', '')
+RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL') or REDIS_URL or 'memory'
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '500'))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '3600'))  # seconds
+
+# How often the data version is re-read; bounds how stale a page can be
+VERSION_CHECK_SECONDS = float(os.getenv('RESPONSE_CACHE_VERSION_CHECK_SECONDS', '1'))
+VERSION_FILE = os.getenv('RESPONSE_CACHE_VERSION_FILE', '.response_cache_version')
+VERSION_KEY = 'response:data_version'
+
+class ResponseCache:
+    """
+    Per-process LRU of responses and fragments, optionally backed by Redis
+
+    Only responses go to Redis; fragments are arbitrary Python objects and
+    stay in the local LRU.
+    """
+
+    def __init__(self, url: str = RESPONSE_CACHE_URL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl: int = RESPONSE_CACHE_TTL, version_file: str = VERSION_FILE,
+                 version_check: float = VERSION_CHECK_SECONDS, version_url: str = REDIS_URL):
+        self.url = url
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_file = version_file
+        self.version_check = version_check
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()  # key -> (expires at, value)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._version: Optional[str] = None
+        self._version_read_at = 0.0
+
+        # Responses go to self.redis; the data version to self.version_redis,
+        # which is also used on its own to share the version between processes
+        self.redis = None
+        self.version_redis = None
+        if url.startswith(('redis://', 'rediss://')):
+            import redis
+            self.redis = redis.Redis.from_url(url)
+            self.version_redis = self.redis
+        elif version_url.startswith(('redis://', 'rediss://')):
+            import redis
+            self.version_redis = redis.Redis.from_url(version_url)
+
+    def data_version(self) -> str:
+        """Current data version, re-read at most every version_check seconds"""
+        now = time.monotonic()
+        if self._version is None or now - self._version_read_at >= self.version_check:
+            self._version = self._read_version()
+            self._version_read_at = now
+        return self._version
+
+    def _read_version(self) -> str:
+        try:
+            if self.version_redis is not None:
+                value = self.version_redis.get(VERSION_KEY)
+                return value.decode('ascii') if value else '0'
+            with open(self.version_file, 'r') as f:
+                return f.read().strip() or '0'
+        except FileNotFoundError:
+            return '0'
+        except Exception as e:
+            logger.warning(f"Could not read response cache version: {e}")
+            return self._version or '0'
+
+    def bump_version(self):
+        """Invalidate every cached entry, in all processes"""
+        try:
+            if self.version_redis is not None:
+                self.version_redis.incr(VERSION_KEY)
+            else:
+                tmp_path = f"{self.version_file}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write(str(time.time_ns()))
+                os.replace(tmp_path, self.version_file)
+        except Exception as e:
+            logger.warning(f"Could not bump response cache version: {e}")
+        self._version = None
+
+    def make_key(self, name: str, *parts: Any) -> str:
+        return f"{self.data_version()}:{name}:{urlencode([(str(i), part) for i, part in enumerate(parts)])}"
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() > expires_at:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_response(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Cached (body, content type) for a key"""
+        value = self._get_local(key)
+        if value is None and self.redis is not None:
+            try:
+                raw = self.redis.get(f"response:{key}")
+            except Exception as e:
+                logger.warning(f"Response cache lookup failed: {e}")
+                raw = None
+            if raw is not None:
+                content_type, _, body = raw.partition(b'\n')
+                value = (body, content_type.decode('ascii'))
+                self._set_local(key, value)
+
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set_response(self, key: str, body: bytes, content_type: str):
+        self._set_local(key, (body, content_type))
+        if self.redis is not None:
+            try:
+                self.redis.set(f"response:{key}", content_type.encode('ascii') + b'\n' + body, ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def fragment(self, name: str, build: Callable[[], Any], *parts: Any, ttl: Optional[float] = None) -> Any:
+        """
+        Value of build(), computed once per data version and parts
+
+        Pass a ttl shorter than the cache's for values that change without a
+        data version bump.
+        """
+        key = self.make_key(f"fragment:{name}", *parts)
+        value = self._get_local(key)
+        if value is None:
+            value = build()
+            self._set_local(key, value, ttl)
+        return value
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide response cache, or None if disabled or unavailable"""
+    global _response_cache
+
+    if RESPONSE_CACHE_URL.lower() in ('', 'none', 'off'):
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            try:
+                _response_cache = ResponseCache()
+            except Exception as e:
+                logger.warning(f"Response cache disabled, could not open {RESPONSE_CACHE_URL}: {e}")
+                return None
+            if _response_cache.version_redis is None:
+                logger.warning(
+                    f"Response cache data version is kept in {os.path.abspath(VERSION_FILE)}; unless every "
+                    f"web and worker process shares that file, pages can stay stale for up to "
+                    f"{RESPONSE_CACHE_TTL}s after new data. Set REDIS_URL to share it through Redis."
+                )
+        return _response_cache
+
+def bump_data_version():
+    """Mark all cached responses stale; call after committing agenda or summary changes"""
+    cache = get_response_cache()
+    if cache is not None:
+        cache.bump_version()
+
+def cached_fragment(name: str, build: Callable[[], Any], *parts: Any, ttl: Optional[float] = None) -> Any:
+    """build() cached per data version (and at most ttl seconds), or called directly if caching is off"""
+    cache = get_response_cache()
+    if cache is None:
+        return build()
+    return cache.fragment(name, build, *parts, ttl=ttl)
+
+def skip_response_cache():
+    """Keep the response of the current request out of the cache (e.g. an error fallback page)"""
+    g.skip_response_cache = True
+
+def cached_response(view):
+    """
+    Cache a GET view's successful responses per data version
+
+    The key covers the endpoint, its URL arguments and the query string.
+    Responses are sent with an X-Cache: HIT or MISS header.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = get_response_cache()
+        if cache is None or request.method != 'GET':
+            return view(*args, **kwargs)
+
+        key = cache.make_key(
+            request.endpoint,
+            urlencode(sorted(kwargs.items())),
+            urlencode(sorted(request.args.items(multi=True)))
+        )
+        cached = cache.get_response(key)
+        if cached is not None:
+            body, content_type = cached
+            return current_app.response_class(body, content_type=content_type, headers={'X-Cache': 'HIT'})
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.direct_passthrough and not g.get('skip_response_cache'):
+            cache.set_response(key, response.get_data(), response.content_type)
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
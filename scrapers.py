@@ -3,109 +3,597 @@ Web scraping utilities for meeting agendas
 """
 
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from datetime import datetime, timedelta, date
 import time
+import os
 import logging
-from typing import List, Dict, Optional
-from urllib.parse import urljoin, urlparse
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, NamedTuple, Collection, Callable
+from urllib.parse import urljoin, urlparse, urlencode, parse_qsl, urlunparse
 import re
+import hashlib
+import tempfile
+
+from http_cache import HTTPCache, get_default_cache
+from http_session import get_session, connection_stats, request_timeout, retry_delay, RETRY_TOTAL, RETRY_STATUSES
+from date_parsing import parse_date
+from document_extractor import (
+    DocumentExtractor, ExtractionTimeout, EXTRACT_TIMEOUT, MAX_DOCUMENT_BYTES, SUPPORTED_EXTENSIONS, document_extension
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Politeness settings for concurrent fetching
+DEFAULT_MAX_WORKERS_PER_HOST = int(os.getenv('SCRAPER_MAX_WORKERS_PER_HOST', '4'))
+DEFAULT_REQUESTS_PER_SECOND = float(os.getenv('SCRAPER_REQUESTS_PER_SECOND', '2'))
+
+# Upper bound on stored agenda text; long agendas are summarized in chunks
+MAX_AGENDA_CHARS = int(os.getenv('SCRAPER_MAX_AGENDA_CHARS', '200000'))
+
+# BeautifulSoup tree builder; lxml is several times faster than html.parser
+HTML_PARSER = os.getenv('SCRAPER_HTML_PARSER', 'lxml')
+
+# Wall-clock budget for a single source in scrape_all_sources (seconds)
+DEFAULT_SOURCE_TIMEOUT = float(os.getenv('SCRAPER_SOURCE_TIMEOUT', '600'))
+
+# Scraped records buffered between scraper threads and the consumer of
+# iter_scraped_agendas; scrapers block once it is full
+DEFAULT_STREAM_QUEUE_SIZE = int(os.getenv('SCRAPER_STREAM_QUEUE_SIZE', '100'))
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace requests to a single host"""
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        if self.rate <= 0:
+            return
+        
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+            
+            time.sleep(wait)
+
+class FetchResult(NamedTuple):
+    """Raw page body returned by BaseScraper.fetch"""
+    url: str
+    content: bytes
+    not_modified: bool  # True when served from the HTTP cache after a 304
+
+class DownloadResult(NamedTuple):
+    """Document streamed to a temporary file by BaseScraper.download"""
+    url: str
+    path: Optional[str]  # None if too_large
+    sha256: Optional[str]
+    size: int
+    too_large: bool = False
+
 class BaseScraper:
     """Base class for meeting agenda scrapers"""
     
-    def __init__(self, source_name: str, base_url: str):
+    def __init__(self, source_name: str, base_url: str,
+                 max_workers_per_host: int = DEFAULT_MAX_WORKERS_PER_HOST,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 cache: Optional[HTTPCache] = None,
+                 session: Optional[requests.Session] = None):
         self.source_name = source_name
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.cache = cache if cache is not None else get_default_cache()
+        self.max_workers_per_host = max(1, max_workers_per_host)
+        self.requests_per_second = requests_per_second
+        # Shared keep-alive pool that retries failed connections; see http_session
+        self.session = session if session is not None else get_session()
+        
+        # Per-host concurrency caps and rate limiters, created lazily
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._host_lock = threading.Lock()
+        
+        # Optional wall-clock deadline (time.monotonic()); fetches stop once it passes
+        self.deadline: Optional[float] = None
+        self.timed_out = False
+        
+        # URLs already stored; incremental scrapes skip their detail pages
+        self.known_urls: Collection[str] = frozenset()
+        
+        # Per-request timings, collected until pop_metrics(); see metrics.py
+        self.metrics: List[Dict] = []
+        self._metrics_by_url: Dict[str, Dict] = {}
+        self._metrics_lock = threading.Lock()
+    
+    def is_known(self, url: str) -> bool:
+        """Whether an agenda URL has already been scraped"""
+        return url in self.known_urls
+    
+    def time_remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if there is no deadline"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+    
+    def _record_fetch(self, metric: Dict, started: float):
+        """Store the timings of a finished request; started is its time.perf_counter()"""
+        metric['total_ms'] = (time.perf_counter() - started) * 1000
+        if metric.get('ttfb_ms') is not None:
+            metric['download_ms'] = max(0.0, metric['total_ms'] - metric['ttfb_ms'])
+        metric['source'] = self.source_name
+        metric['fetched_at'] = datetime.utcnow()
+        
+        with self._metrics_lock:
+            self.metrics.append(metric)
+            self._metrics_by_url[metric['url']] = metric
+    
+    def _record_parse(self, url: str, parse_ms: float):
+        """Add parse (or document extraction) time to the latest request for a URL"""
+        with self._metrics_lock:
+            metric = self._metrics_by_url.get(url)
+            if metric is not None:
+                metric['parse_ms'] = (metric.get('parse_ms') or 0.0) + parse_ms
+    
+    def pop_metrics(self) -> List[Dict]:
+        """Return and clear the request metrics collected so far"""
+        with self._metrics_lock:
+            metrics, self.metrics = self.metrics, []
+            self._metrics_by_url = {}
+        return metrics
+    
+    def _host_limits(self, url: str) -> Tuple[threading.BoundedSemaphore, TokenBucket]:
+        """Get the concurrency semaphore and token bucket for a URL's host"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_workers_per_host)
+                self._host_buckets[host] = TokenBucket(self.requests_per_second)
+            return self._host_semaphores[host], self._host_buckets[host]
     
-    def get_page(self, url: str, timeout: int = 30) -> Optional[BeautifulSoup]:
-        """Fetch and parse a web page"""
+    def _wait_for_retry(self, delay: float) -> bool:
+        """Sleep before a retry, unless the wait would run past the deadline"""
+        remaining = self.time_remaining()
+        if remaining is not None and delay >= remaining:
+            return False
+        time.sleep(delay)
+        return True
+    
+    def _get(self, url: str, timeout: float, bucket: TokenBucket, **kwargs) -> requests.Response:
+        """
+        GET a URL, retrying read timeouts, 429 and 5xx responses
+        
+        Every attempt's timeout is clamped to the time remaining, and a retry
+        is only made if its backoff (or the server's Retry-After) fits before
+        the deadline; otherwise the last response is returned or the timeout
+        raised. Retries are paced by the host's token bucket.
+        """
+        for attempt in range(RETRY_TOTAL + 1):
+            if attempt:
+                bucket.acquire()
+            
+            attempt_timeout = timeout
+            remaining = self.time_remaining()
+            if remaining is not None:
+                attempt_timeout = max(0.001, min(timeout, remaining))
+            
+            try:
+                response = self.session.get(url, timeout=request_timeout(attempt_timeout), **kwargs)
+            except requests.ReadTimeout:
+                if attempt == RETRY_TOTAL or not self._wait_for_retry(retry_delay(attempt)):
+                    raise
+                continue
+            
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                return response
+            if not self._wait_for_retry(retry_delay(attempt, response)):
+                return response
+            response.close()
+    
+    def fetch(self, url: str, timeout: int = 30) -> Optional[FetchResult]:
+        """
+        Fetch a page body, revalidating against the HTTP cache when possible
+        
+        Returns None if the request failed or the scraper is out of time.
+        """
+        semaphore, bucket = self._host_limits(url)
+        with semaphore:
+            bucket.acquire()
+            
+            # Skip the fetch entirely once the scraper has run out of time
+            remaining = self.time_remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    self.timed_out = True
+                    return None
+                timeout = min(timeout, remaining)
+            
+            started = time.perf_counter()
+            metric = {'url': url, 'kind': 'page', 'cache_hit': False}
+            try:
+                headers = self.cache.validators(url) if self.cache else {}
+                response = self._get(url, timeout, bucket, headers=headers)
+                # Time from sending the request to parsed headers, including connection setup
+                metric['ttfb_ms'] = response.elapsed.total_seconds() * 1000
+                
+                if response.status_code == 304 and self.cache:
+                    body = self.cache.get_body(url)
+                    if body is not None:
+                        metric.update(status_code=304, cache_hit=True, bytes=len(body))
+                        return FetchResult(url, body, True)
+                    # Cached body went missing; fetch it unconditionally
+                    response = self._get(url, timeout, bucket)
+                
+                metric['status_code'] = response.status_code
+                response.raise_for_status()
+                metric['bytes'] = len(response.content)
+                if self.cache:
+                    self.cache.store(url, response)
+                return FetchResult(url, response.content, False)
+            except requests.RequestException as e:
+                logger.error(f"Error fetching {url}: {e}")
+                metric['error'] = str(e)[:500]
+                return None
+            finally:
+                self._record_fetch(metric, started)
+    
+    def download(self, url: str, max_bytes: int = MAX_DOCUMENT_BYTES,
+                 timeout: int = 60) -> Optional[DownloadResult]:
+        """
+        Stream a document to a temporary file, hashing it on the way
+        
+        Documents bigger than max_bytes are abandoned and returned with
+        too_large set and no file. Otherwise the caller is responsible for
+        removing the returned file.
+        """
+        semaphore, bucket = self._host_limits(url)
+        with semaphore:
+            bucket.acquire()
+            
+            remaining = self.time_remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    self.timed_out = True
+                    return None
+                timeout = min(timeout, remaining)
+            
+            path = None
+            started = time.perf_counter()
+            metric = {'url': url, 'kind': 'document', 'cache_hit': False}
+            try:
+                with self._get(url, timeout, bucket, stream=True) as response:
+                    metric['ttfb_ms'] = response.elapsed.total_seconds() * 1000
+                    metric['status_code'] = response.status_code
+                    response.raise_for_status()
+                    
+                    declared = int(response.headers.get('Content-Length') or 0)
+                    if declared > max_bytes:
+                        logger.warning(f"Skipping {url}: {declared} bytes exceeds the {max_bytes} byte cap")
+                        metric['error'] = 'Exceeds byte cap'
+                        return DownloadResult(url, None, None, declared, too_large=True)
+                    
+                    digest = hashlib.sha256()
+                    size = 0
+                    fd, path = tempfile.mkstemp(suffix=document_extension(url))
+                    with os.fdopen(fd, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            size += len(chunk)
+                            if size > max_bytes:
+                                logger.warning(f"Skipping {url}: larger than the {max_bytes} byte cap")
+                                metric['error'] = 'Exceeds byte cap'
+                                os.remove(path)
+                                return DownloadResult(url, None, None, size, too_large=True)
+                            digest.update(chunk)
+                            f.write(chunk)
+                
+                metric['bytes'] = size
+                return DownloadResult(url, path, digest.hexdigest(), size)
+            except (requests.RequestException, OSError) as e:
+                logger.error(f"Error downloading {url}: {e}")
+                metric['error'] = str(e)[:500]
+                if path and os.path.exists(path):
+                    os.remove(path)
+                return None
+            finally:
+                self._record_fetch(metric, started)
+    
+    def parse_html(self, content: bytes, parse_only: Optional[SoupStrainer] = None,
+                   url: Optional[str] = None) -> BeautifulSoup:
+        """
+        Parse a page body with BeautifulSoup
+        
+        Pass a SoupStrainer to build only the elements a scraper reads, which
+        keeps parse time and memory down on large listing pages. Parse time is
+        added to the request metrics of url, if given.
+        """
+        started = time.perf_counter()
+        soup = BeautifulSoup(content, HTML_PARSER, parse_only=parse_only)
+        if url:
+            self._record_parse(url, (time.perf_counter() - started) * 1000)
+        return soup
+    
+    def parse_tree(self, content: bytes, url: Optional[str] = None) -> Optional[lxml.html.HtmlElement]:
+        """Parse a page body into a raw lxml tree for XPath lookups"""
+        started = time.perf_counter()
         try:
-            response = self.session.get(url, timeout=timeout)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
-        except requests.RequestException as e:
-            logger.error(f"Error fetching {url}: {e}")
+            return lxml.html.document_fromstring(content)
+        except (lxml.etree.ParserError, ValueError):
+            return None
+        finally:
+            if url:
+                self._record_parse(url, (time.perf_counter() - started) * 1000)
+    
+    def element_text(self, element: lxml.html.HtmlElement, separator: str = '\n') -> str:
+        """
+        Text of an lxml element, like BeautifulSoup's get_text(separator, strip=True)
+        
+        Script and style contents are skipped.
+        """
+        texts = element.xpath('.//text()[not(ancestor::script) and not(ancestor::style)]')
+        return separator.join(text.strip() for text in texts if text.strip())
+    
+    def get_page(self, url: str, timeout: int = 30,
+                 parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+        """Fetch and parse a web page, optionally keeping only parse_only elements"""
+        result = self.fetch(url, timeout)
+        if not result:
+            return None
+        return self.parse_html(result.content, parse_only, url)
+    
+    def get_tree(self, url: str, timeout: int = 30) -> Optional[lxml.html.HtmlElement]:
+        """Fetch a web page and parse it into an lxml tree"""
+        result = self.fetch(url, timeout)
+        if not result:
             return None
+        return self.parse_tree(result.content, url)
+    
+    def fetch_pages(self, urls: Iterable[str], timeout: int = 30) -> Iterator[Tuple[str, Optional[FetchResult]]]:
+        """
+        Fetch several pages concurrently
+        
+        Requests are capped at max_workers_per_host in flight per host and paced
+        by a per-host token bucket. Results are yielded as (url, result) pairs in
+        completion order; result is None when the fetch failed.
+        """
+        return self._map_concurrently(self.fetch, urls, timeout)
+    
+    def download_documents(self, urls: Iterable[str]) -> Iterator[Tuple[str, Optional[DownloadResult]]]:
+        """Download several documents concurrently, yielding (url, download) as each completes"""
+        return self._map_concurrently(self.download, urls)
+    
+    def _map_concurrently(self, func, urls: Iterable[str], *args) -> Iterator[Tuple[str, object]]:
+        """
+        Run func(url, *args) for each URL in a thread pool sized to the per-host limits
+        
+        Only a small window of calls is queued ahead of the consumer, so
+        finished pages don't pile up in memory while it is busy.
+        """
+        urls = list(dict.fromkeys(urls))  # De-duplicate, keep order
+        if not urls:
+            return
+        
+        hosts = {urlparse(url).netloc for url in urls}
+        max_workers = min(len(urls), self.max_workers_per_host * len(hosts))
+        window = max_workers * 2
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for url in urls:
+                if len(futures) >= window:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield futures.pop(future), future.result()
+                futures[executor.submit(func, url, *args)] = url
+            
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def get_pages(self, urls: Iterable[str], timeout: int = 30,
+                  parse_only: Optional[SoupStrainer] = None) -> Iterator[Tuple[str, Optional[BeautifulSoup]]]:
+        """Fetch and parse several pages concurrently, yielding (url, soup) as each completes"""
+        for url, result in self.fetch_pages(urls, timeout):
+            yield url, self.parse_html(result.content, parse_only, url) if result else None
+    
+    def get_trees(self, urls: Iterable[str], timeout: int = 30) -> Iterator[Tuple[str, Optional[lxml.html.HtmlElement]]]:
+        """Fetch several pages concurrently, yielding (url, lxml tree) as each completes"""
+        for url, result in self.fetch_pages(urls, timeout):
+            yield url, self.parse_tree(result.content, url) if result else None
+    
+    def iter_agendas(self) -> Iterator[Dict]:
+        """
+        Yield agenda records as soon as each one is scraped
+        
+        Override this method in subclasses.
+        """
+        raise NotImplementedError
     
     def scrape_agendas(self) -> List[Dict]:
-        """Override this method in subclasses"""
+        """Scrape all agendas into a list"""
+        return list(self.iter_agendas())
+    
+    def backfill_units(self) -> List[str]:
+        """
+        Independent slices of the full history, e.g. one per meeting type
+        
+        Each unit is backfilled (and checkpointed) separately. Override this
+        method in subclasses that support backfill.
+        """
+        raise NotImplementedError
+    
+    def iter_backfill_pages(self, unit: str, since: date,
+                            cursor: Optional[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        Walk a unit's history back to since, one page at a time
+        
+        Yields (cursor, agendas) after each page; passing the last cursor back
+        in resumes after that page. Agendas in known_urls are skipped. Raises
+        if a page can't be fetched, so a retry resumes from the same cursor.
+        Override this method in subclasses that support backfill.
+        """
         raise NotImplementedError
 
 class WilliamsburgScraper(BaseScraper):
     """Scraper for Williamsburg City Council meetings"""
     
+    # Elements read from each civicweb page. The small index page is parsed
+    # with a SoupStrainer; listing and detail pages, which are large, use raw
+    # lxml trees and XPath
+    MEETING_TYPE_LINKS = SoupStrainer('a', href=re.compile(r'MeetingSchedule\.aspx'))
+    MEETING_ROWS_XPATH = "//tr[contains(@class, 'odd') or contains(@class, 'even')]"
+    
+    # Archive listings are paged by year through this query parameter
+    YEAR_PARAM = 'Year'
+    
+    # Agenda text containers on meeting detail pages, most specific first
+    CONTENT_XPATHS = [
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' meeting-content ')]",
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' agenda-content ')]",
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' meeting-details ')]",
+        "//*[@id='content']",
+        "//*[contains(concat(' ', normalize-space(@class), ' '), ' main-content ')]"
+    ]
+    
     def __init__(self):
         super().__init__('williamsburg', 'https://williamsburg.civicweb.net')
     
-    def scrape_agendas(self) -> List[Dict]:
-        """Scrape meeting agendas from Williamsburg City Council"""
-        agendas = []
-        
+    def iter_agendas(self) -> Iterator[Dict]:
+        """Scrape meeting agendas from Williamsburg City Council, yielding each as its detail page is parsed"""
         try:
-            # Get the main meeting types page
-            soup = self.get_page(f"{self.base_url}/Portal/MeetingTypeList.aspx")
-            if not soup:
-                return agendas
-            
-            # Find meeting type links
-            meeting_links = soup.find_all('a', href=re.compile(r'MeetingSchedule\.aspx'))
+            meeting_type_urls = self._meeting_type_urls(limit=3)  # Limit to first 3 meeting types
             
-            for link in meeting_links[:3]:  # Limit to first 3 meeting types
-                meeting_type_url = urljoin(self.base_url, link.get('href'))
-                agendas.extend(self._scrape_meeting_type(meeting_type_url))
-                time.sleep(1)  # Be respectful with requests
+            # Fetch the meeting type listings concurrently and stream each
+            # listing's detail pages as soon as it arrives
+            seen = set()
+            for url, listing in self.get_trees(meeting_type_urls):
+                if listing is None:
+                    continue
+                
+                meetings = []
+                for meeting in self._parse_meeting_rows(listing):
+                    if meeting['original_url'] not in seen:
+                        seen.add(meeting['original_url'])
+                        meetings.append(meeting)
+                
+                yield from self._iter_agenda_content(meetings)
                 
         except Exception as e:
             logger.error(f"Error scraping Williamsburg agendas: {e}")
+    
+    def backfill_units(self) -> List[str]:
+        """Every meeting type listing"""
+        return self._meeting_type_urls(limit=None)
+    
+    def iter_backfill_pages(self, unit: str, since: date,
+                            cursor: Optional[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        Walk a meeting type's listing one year at a time, newest first; the cursor is the last year done
         
-        return agendas
+        A year whose listing contains meetings from other years fails, since
+        that means the portal ignored YEAR_PARAM and served the default listing.
+        """
+        start_year = int(cursor) - 1 if cursor else datetime.utcnow().year
+        
+        for year in range(start_year, since.year - 1, -1):
+            tree = self.get_tree(self._with_query(unit, {self.YEAR_PARAM: year}))
+            if tree is None:
+                raise RuntimeError(f"Could not fetch {year} listing for {unit}")
+            
+            rows = [meeting for meeting in self._parse_meeting_rows(tree, limit=None) if meeting['meeting_date']]
+            other_years = sorted({meeting['meeting_date'].year for meeting in rows} - {year})
+            if other_years:
+                raise RuntimeError(f"The {year} listing for {unit} has meetings from {other_years}; "
+                                   f"the {self.YEAR_PARAM} parameter was not applied")
+            
+            meetings = [meeting for meeting in rows if meeting['meeting_date'] >= since]
+            agendas = list(self._iter_agenda_content(meetings))
+            
+            # Meetings whose detail page failed are left out; fail the year so
+            # a retry fetches them instead of checkpointing past them
+            missing = sum(1 for meeting in meetings if not self.is_known(meeting['original_url'])) - len(agendas)
+            if missing:
+                raise RuntimeError(f"Could not fetch {missing} meeting pages from the {year} listing for {unit}")
+            yield str(year), agendas
+    
+    def _meeting_type_urls(self, limit: Optional[int]) -> List[str]:
+        """Meeting type listing URLs from the portal index, optionally only the first few"""
+        # Get the main meeting types page
+        soup = self.get_page(f"{self.base_url}/Portal/MeetingTypeList.aspx", parse_only=self.MEETING_TYPE_LINKS)
+        if not soup:
+            return []
+        
+        # Find meeting type links
+        meeting_links = soup.find_all('a', href=re.compile(r'MeetingSchedule\.aspx'))
+        if limit is not None:
+            meeting_links = meeting_links[:limit]
+        
+        return list(dict.fromkeys(urljoin(self.base_url, link.get('href')) for link in meeting_links))
+    
+    def _with_query(self, url: str, params: Dict) -> str:
+        """Add or replace query parameters on a URL"""
+        parts = urlparse(url)
+        query = dict(parse_qsl(parts.query))
+        query.update({key: str(value) for key, value in params.items()})
+        return urlunparse(parts._replace(query=urlencode(query)))
     
     def _scrape_meeting_type(self, url: str) -> List[Dict]:
         """Scrape meetings for a specific meeting type"""
-        meetings = []
+        tree = self.get_tree(url)
+        if tree is None:
+            return []
         
-        soup = self.get_page(url)
-        if not soup:
-            return meetings
+        return list(self._iter_agenda_content(self._parse_meeting_rows(tree)))
+    
+    def _parse_meeting_rows(self, tree: lxml.html.HtmlElement, limit: Optional[int] = 10) -> List[Dict]:
+        """Extract meeting records (without agenda content) from a meeting type listing"""
+        meetings = []
         
         # Look for meeting rows in tables
-        meeting_rows = soup.find_all('tr', class_=re.compile(r'(odd|even)'))
+        meeting_rows = tree.xpath(self.MEETING_ROWS_XPATH)
+        if limit is not None:
+            meeting_rows = meeting_rows[:limit]  # Limit recent meetings
         
-        for row in meeting_rows[:10]:  # Limit recent meetings
+        for row in meeting_rows:
             try:
                 # Extract meeting information
-                cells = row.find_all('td')
+                cells = row.xpath('.//td')
                 if len(cells) >= 2:
                     date_cell = cells[0]
                     title_cell = cells[1]
                     
                     # Extract date
-                    date_text = date_cell.get_text(strip=True)
-                    meeting_date = self._parse_date(date_text)
+                    date_text = self.element_text(date_cell, separator='')
+                    meeting_date = parse_date(date_text)
+                    if meeting_date is None:
+                        logger.warning(f"Could not parse date: {date_text.strip()}")
                     
                     # Extract title and link
-                    link = title_cell.find('a')
-                    if link:
-                        title = link.get_text(strip=True)
+                    links = title_cell.xpath('.//a')
+                    if links:
+                        link = links[0]
+                        title = self.element_text(link, separator='')
                         agenda_url = urljoin(self.base_url, link.get('href'))
                         
-                        # Get agenda content
-                        content = self._get_agenda_content(agenda_url)
-                        
                         meetings.append({
                             'meeting_date': meeting_date,
                             'meeting_title': title,
                             'original_url': agenda_url,
-                            'agenda_content': content,
+                            'agenda_content': '',
                             'source': self.source_name
                         })
                         
@@ -115,172 +603,459 @@ class WilliamsburgScraper(BaseScraper):
         
         return meetings
     
+    def _iter_agenda_content(self, meetings: List[Dict]) -> Iterator[Dict]:
+        """Fetch agenda detail pages concurrently, yielding each meeting with its agenda_content"""
+        # Meetings we already have are dropped before any detail fetch
+        by_url = {
+            meeting['original_url']: meeting for meeting in meetings
+            if not self.is_known(meeting['original_url'])
+        }
+        
+        for url, result in self.fetch_pages(by_url):
+            meeting = by_url.pop(url)
+            if result is None:
+                # Failed or out of time; the meeting is left out rather than
+                # stored without content, so the next run fetches it again
+                continue
+            
+            try:
+                # Unchanged pages reuse the text extracted on the previous run
+                content = None
+                if result.not_modified:
+                    content = self.cache.get_derived(url, 'agenda_content')
+                
+                if content is None:
+                    content = self._extract_agenda_content(self.parse_tree(result.content, url))
+                    if self.cache:
+                        self.cache.set_derived(url, 'agenda_content', content)
+                
+                meeting['agenda_content'] = content
+            except Exception as e:
+                logger.error(f"Error extracting agenda content from {url}: {e}")
+                continue
+            
+            yield meeting
+    
     def _get_agenda_content(self, url: str) -> str:
         """Extract agenda content from meeting page"""
-        soup = self.get_page(url)
-        if not soup:
+        return self._extract_agenda_content(self.get_tree(url))
+    
+    def _extract_agenda_content(self, tree: Optional[lxml.html.HtmlElement]) -> str:
+        """Extract agenda content from a meeting page parsed with parse_tree"""
+        if tree is None:
             return ""
         
         # Look for content in common containers
-        content_selectors = [
-            '.meeting-content',
-            '.agenda-content',
-            '.meeting-details',
-            '#content',
-            '.main-content'
-        ]
-        
-        for selector in content_selectors:
-            content_div = soup.select_one(selector)
-            if content_div:
-                return content_div.get_text(separator='\n', strip=True)
+        for xpath in self.CONTENT_XPATHS:
+            matches = tree.xpath(xpath)
+            if matches:
+                return self.element_text(matches[0])[:MAX_AGENDA_CHARS]
         
         # Fallback: get all text from body
-        body = soup.find('body')
-        if body:
-            return body.get_text(separator='\n', strip=True)[:5000]  # Limit length
+        body = tree.find('body')
+        if body is not None:
+            return self.element_text(body)[:MAX_AGENDA_CHARS]  # Limit length
         
         return ""
-    
-    def _parse_date(self, date_str: str) -> Optional[datetime]:
-        """Parse date string into datetime object"""
-        if not date_str:
-            return None
-            
-        # Clean the date string
-        date_str = date_str.strip()
-        
-        date_formats = [
-            '%m/%d/%Y',
-            '%m-%d-%Y',
-            '%B %d, %Y',
-            '%b %d, %Y',
-            '%Y-%m-%d',
-            '%d/%m/%Y'
-        ]
-        
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
-        
-        # Try to extract just year if nothing else works
-        try:
-            import re
-            year_match = re.search(r'20\d{2}', date_str)
-            if year_match:
-                year = int(year_match.group())
-                return datetime(year, 1, 1).date()
-        except:
-            pass
-        
-        logger.warning(f"Could not parse date: {date_str}")
-        return None
 
 class JamesCityScraper(BaseScraper):
     """Scraper for James City County Council meetings"""
     
+    # Only the document links are read from the agendas page
+    DOCUMENT_LINKS = SoupStrainer('a', href=re.compile(r'\.(pdf|doc|docx)$', re.I))
+    
+    # Documents per backfill checkpoint
+    BACKFILL_PAGE_SIZE = 20
+    
     def __init__(self):
         super().__init__('jamescity', 'https://www.jamescitycountyva.gov')
     
-    def scrape_agendas(self) -> List[Dict]:
-        """Scrape meeting agendas from James City County"""
-        agendas = []
-        
+    def iter_agendas(self) -> Iterator[Dict]:
+        """Scrape meeting agendas from James City County, yielding each as its document is read"""
         try:
             # Get the agendas and minutes page
-            soup = self.get_page(f"{self.base_url}/129/Agendas-Minutes")
+            soup = self.get_page(f"{self.base_url}/129/Agendas-Minutes", parse_only=self.DOCUMENT_LINKS)
             if not soup:
-                return agendas
+                return
             
-            # Look for document links
-            doc_links = soup.find_all('a', href=re.compile(r'\.(pdf|doc|docx)$', re.I))
-            
-            for link in doc_links[:20]:  # Limit to recent documents
-                try:
-                    href = link.get('href')
-                    if not href:
-                        continue
-                    
-                    full_url = urljoin(self.base_url, href)
-                    title = link.get_text(strip=True)
-                    
-                    # Extract date from title or link
-                    meeting_date = self._extract_date_from_title(title)
-                    
-                    if meeting_date:
-                        agendas.append({
-                            'meeting_date': meeting_date,
-                            'meeting_title': title,
-                            'original_url': full_url,
-                            'agenda_content': f"Document: {title}",  # PDF content extraction would need additional libraries
-                            'source': self.source_name
-                        })
-                        
-                except Exception as e:
-                    logger.error(f"Error processing James City document: {e}")
-                    continue
+            agendas = [
+                agenda for agenda in self._document_records(soup, limit=20)  # Limit to recent documents
+                if not self.is_known(agenda['original_url'])
+            ]
+            yield from self._iter_document_text(agendas)
                     
         except Exception as e:
             logger.error(f"Error scraping James City agendas: {e}")
+    
+    def backfill_units(self) -> List[str]:
+        """The agendas and minutes page, which lists every document"""
+        return [f"{self.base_url}/129/Agendas-Minutes"]
+    
+    def iter_backfill_pages(self, unit: str, since: date,
+                            cursor: Optional[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        Walk the dated documents newest first, BACKFILL_PAGE_SIZE at a time
+        
+        The cursor is the backfill_key of the last document done, so documents
+        published between runs don't shift where a resumed walk picks up. A
+        page with documents that could not be downloaded or ran out of time
+        raises instead of moving the cursor past them: backfilled meetings are
+        too old for the regular scrape to fetch again.
+        """
+        soup = self.get_page(unit, parse_only=self.DOCUMENT_LINKS)
+        if not soup:
+            raise RuntimeError(f"Could not fetch {unit}")
+        
+        records = sorted(
+            (agenda for agenda in self._document_records(soup, limit=None) if agenda['meeting_date'] >= since),
+            key=self.backfill_key, reverse=True
+        )
+        # Cursors from before keys were used are list offsets; those units start over
+        if cursor and '|' in cursor:
+            records = [agenda for agenda in records if self.backfill_key(agenda) < cursor]
+        
+        for start in range(0, len(records), self.BACKFILL_PAGE_SIZE):
+            page = records[start:start + self.BACKFILL_PAGE_SIZE]
+            new = [agenda for agenda in page if not self.is_known(agenda['original_url'])]
+            failures = {}
+            agendas = list(self._iter_document_text(new, failures))
+            # A document that failed to extract would fail the same way again
+            retry = [url for url, reason in failures.items() if reason in ('download', 'timeout')]
+            if retry:
+                raise RuntimeError(f"Could not read {len(retry)} documents from {unit}, first {retry[0]}")
+            yield self.backfill_key(page[-1]), agendas
+    
+    def backfill_key(self, agenda: Dict) -> str:
+        """Stable sort key of a document: its meeting date, then a hash of its URL"""
+        url_hash = hashlib.sha256(agenda['original_url'].encode('utf-8')).hexdigest()[:16]
+        return f"{agenda['meeting_date'].isoformat()}|{url_hash}"
+    
+    def _document_records(self, soup: BeautifulSoup, limit: Optional[int]) -> List[Dict]:
+        """Agenda records (with placeholder content) for the dated document links on a page"""
+        agendas = []
+        
+        # Look for document links
+        doc_links = soup.find_all('a', href=re.compile(r'\.(pdf|doc|docx)$', re.I))
+        if limit is not None:
+            doc_links = doc_links[:limit]
+        
+        for link in doc_links:
+            try:
+                href = link.get('href')
+                if not href:
+                    continue
+                
+                full_url = urljoin(self.base_url, href)
+                title = link.get_text(strip=True)
+                
+                # Extract date from title or link
+                meeting_date = parse_date(title)
+                
+                if meeting_date:
+                    agendas.append({
+                        'meeting_date': meeting_date,
+                        'meeting_title': title,
+                        'original_url': full_url,
+                        'agenda_content': f"Document: {title}",  # Replaced by extracted text when available
+                        'source': self.source_name,
+                        'extraction_failed': True  # Cleared once the document's text is extracted
+                    })
+                    
+            except Exception as e:
+                logger.error(f"Error processing James City document: {e}")
+                continue
         
         return agendas
     
-    def _extract_date_from_title(self, title: str) -> Optional[datetime]:
-        """Extract date from document title"""
-        if not title:
-            return None
-            
-        # Common date patterns in document titles
-        date_patterns = [
-            r'(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-            r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}',
-            r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s+\d{4}',
-            r'(\d{4})'  # Just year as fallback
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, title, re.IGNORECASE)
-            if match:
-                date_str = match.group(1)
-                date_formats = [
-                    '%m/%d/%Y', '%m-%d-%Y',
-                    '%Y/%m/%d', '%Y-%m-%d',
-                    '%B %d, %Y', '%B %d %Y',
-                    '%b %d, %Y', '%b %d %Y',
-                    '%Y'  # Just year
-                ]
+    def _iter_document_text(self, agendas: List[Dict],
+                            failures: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+        """
+        Replace placeholder content with text extracted from each document
+        
+        Downloads run concurrently under the per-host limits and extraction
+        runs in a process pool, so a long agenda packet only occupies one
+        worker. Agendas are yielded as their extraction finishes.
+        
+        Documents in a format that can't be extracted, over the size cap or
+        with no text keep their placeholder and extraction_failed. Those that could not be
+        downloaded, whose extraction failed or that ran out of time are left
+        out, so the next run tries them again; with failures, the reason for
+        each ('download', 'error' or 'timeout') is recorded by URL.
+        """
+        by_url = {}
+        for agenda in agendas:
+            if document_extension(agenda['original_url']) in SUPPORTED_EXTENSIONS:
+                by_url[agenda['original_url']] = agenda
+            else:
+                yield agenda
+        if not by_url:
+            return
+        
+        pending = {}
+        with DocumentExtractor() as extractor:
+            try:
+                for url, download in self.download_documents(by_url):
+                    agenda = by_url.pop(url)
+                    if not download:
+                        self._skip_document(url, 'download', failures)
+                        continue
+                    if download.too_large:
+                        yield agenda  # Never extracted, so it keeps its placeholder
+                        continue
+                    
+                    text = extractor.cached_text(download.sha256)
+                    if text is None:
+                        pending[url] = (agenda, download, extractor.submit(download.path, document_extension(url)))
+                    else:
+                        os.remove(download.path)
+                        self._set_document_text(agenda, text)
+                        yield agenda
+                    
+                    yield from self._finish_extractions(extractor, pending, failures, block=False)
                 
-                for fmt in date_formats:
+                yield from self._finish_extractions(extractor, pending, failures, block=True)
+            finally:
+                for _, download, _ in pending.values():
                     try:
-                        if fmt == '%Y':
-                            year = int(date_str)
-                            return datetime(year, 1, 1).date()
-                        return datetime.strptime(date_str, fmt).date()
-                    except ValueError:
-                        continue
-        
-        return None
+                        os.remove(download.path)
+                    except OSError:
+                        pass
+    
+    def _finish_extractions(self, extractor: DocumentExtractor, pending: Dict,
+                            failures: Optional[Dict[str, str]], block: bool) -> Iterator[Dict]:
+        """Yield agendas whose extraction has finished, waiting for all of them if block is set"""
+        for url, (agenda, download, job) in list(pending.items()):
+            if not block and not job.ready():
+                continue
+            
+            timeout = EXTRACT_TIMEOUT
+            remaining = self.time_remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    self.timed_out = True
+                timeout = max(0, min(timeout, remaining))
+            
+            try:
+                extraction = extractor.result(job, timeout)
+            except ExtractionTimeout:
+                extraction = None
+                reason = 'timeout'
+            else:
+                reason = 'error'
+            
+            del pending[url]
+            try:
+                os.remove(download.path)
+            except OSError:
+                pass
+            
+            if extraction is None:
+                self._skip_document(url, reason, failures)
+                continue
+            
+            self._record_parse(url, extraction.seconds * 1000)
+            extractor.store_text(download.sha256, extraction.text)
+            self._set_document_text(agenda, extraction.text)
+            yield agenda
+    
+    def _skip_document(self, url: str, reason: str, failures: Optional[Dict[str, str]]):
+        """Log a document left out of this run, and record why in failures"""
+        messages = {
+            'download': 'could not be downloaded',
+            'error': 'could not be extracted',
+            'timeout': 'ran out of time during extraction'
+        }
+        logger.warning(f"Skipping {url} until the next run: the document {messages[reason]}")
+        if failures is not None:
+            failures[url] = reason
+    
+    def _set_document_text(self, agenda: Dict, text: str):
+        text = text.strip()
+        if text:
+            agenda['agenda_content'] = text[:MAX_AGENDA_CHARS]
+            agenda.pop('extraction_failed', None)
 
-def scrape_all_sources() -> Dict[str, List[Dict]]:
-    """Scrape all configured sources"""
-    scrapers = [
+def get_scrapers() -> List[BaseScraper]:
+    """Instantiate every registered scraper"""
+    return [
         WilliamsburgScraper(),
         JamesCityScraper()
     ]
+
+def get_scraper(source_name: str) -> BaseScraper:
+    """The registered scraper for a source name"""
+    for scraper in get_scrapers():
+        if scraper.source_name == source_name:
+            return scraper
+    raise ValueError(f"Unknown source: {source_name}")
+
+def _run_source(scraper: BaseScraper, timeout: float, known_urls: Optional[Collection[str]],
+                emit: Callable[[Dict], None]) -> Dict:
+    """Run one scraper, passing each agenda to emit, and report how it went"""
+    logger.info(f"Scraping {scraper.source_name}...")
     
-    results = {}
+    result = {
+        'source': scraper.source_name,
+        'count': 0,
+        'status': 'success',
+        'error_message': None,
+        'started_at': datetime.utcnow(),
+        'completed_at': None,
+        'duration': None
+    }
+    started = time.monotonic()
+    scraper.deadline = started + timeout
+    scraper.timed_out = False
+    scraper.known_urls = known_urls or frozenset()
     
-    for scraper in scrapers:
-        logger.info(f"Scraping {scraper.source_name}...")
+    try:
+        for agenda in scraper.iter_agendas():
+            emit(agenda)
+            result['count'] += 1
+        if scraper.timed_out:
+            result['status'] = 'partial'
+            result['error_message'] = f"Time budget of {timeout:g}s exceeded"
+        logger.info(f"Scraped {result['count']} agendas from {scraper.source_name}")
+    except Exception as e:
+        logger.error(f"Error scraping {scraper.source_name}: {e}")
+        result['status'] = 'error'
+        result['error_message'] = str(e)
+    
+    result['completed_at'] = datetime.utcnow()
+    result['duration'] = time.monotonic() - started
+    
+    result['metrics'] = scraper.pop_metrics()
+    
+    if scraper.cache:
+        logger.info(f"HTTP cache stats after {scraper.source_name}: {scraper.cache.stats()}")
+    logger.info(f"HTTP connection stats after {scraper.source_name}: {connection_stats(scraper.session)}")
+    return result
+
+def scrape_source(scraper: BaseScraper, timeout: float = DEFAULT_SOURCE_TIMEOUT,
+                  known_urls: Optional[Collection[str]] = None) -> Dict:
+    """
+    Run a single scraper within a wall-clock budget
+    
+    Once the budget is spent the scraper stops issuing requests and returns
+    whatever it has collected, which is reported with status 'partial'.
+    Agendas whose URL is in known_urls are skipped without fetching them.
+    
+    Returns:
+        Dictionary with 'source', 'agendas', 'count', 'status',
+        'error_message', 'started_at', 'completed_at', 'duration' and
+        'metrics' (per-request timings, see metrics.py) keys
+    """
+    agendas = []
+    result = _run_source(scraper, timeout, known_urls, agendas.append)
+    result['agendas'] = agendas
+    return result
+
+_SOURCE_DONE = object()
+
+def iter_scraped_agendas(timeout: float = DEFAULT_SOURCE_TIMEOUT,
+                         known_urls: Optional[Collection[str]] = None,
+                         results: Optional[Dict[str, Dict]] = None,
+                         queue_size: int = DEFAULT_STREAM_QUEUE_SIZE) -> Iterator[Dict]:
+    """
+    Run all registered scrapers concurrently, yielding agendas as they are scraped
+    
+    Scrapers hand records over through a bounded queue and block while the
+    consumer is behind, so memory use does not grow with the number of
+    agendas. Each source has its own time budget. If results is given, each
+    source's outcome (as returned by scrape_source, without 'agendas') is
+    stored in it under the source name once the source finishes.
+    """
+    scrapers = get_scrapers()
+    results = {} if results is None else results
+    records = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+    run_started_at = datetime.utcnow()
+    
+    def emit(item):
+        # Wait for room in the queue unless the consumer has gone away
+        while not stopped.is_set():
+            try:
+                records.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+    
+    def run(scraper):
         try:
-            agendas = scraper.scrape_agendas()
-            results[scraper.source_name] = agendas
-            logger.info(f"Scraped {len(agendas)} agendas from {scraper.source_name}")
-        except Exception as e:
-            logger.error(f"Error scraping {scraper.source_name}: {e}")
-            results[scraper.source_name] = []
+            result = _run_source(scraper, timeout, known_urls, emit)
+            if not stopped.is_set():
+                results[scraper.source_name] = result
+        finally:
+            emit(_SOURCE_DONE)
     
+    executor = ThreadPoolExecutor(max_workers=len(scrapers))
+    for scraper in scrapers:
+        executor.submit(run, scraper)
+    
+    # Scrapers stop fetching at their deadline; the grace period covers
+    # requests that were already in flight
+    hard_deadline = time.monotonic() + timeout + 60
+    running = len(scrapers)
+    overran = False
+    
+    try:
+        while running:
+            try:
+                item = records.get(timeout=max(0, hard_deadline - time.monotonic()))
+            except queue.Empty:
+                overran = True
+                break
+            
+            if item is _SOURCE_DONE:
+                running -= 1
+            else:
+                yield item
+    finally:
+        # Stop scrapers that are still going, whether they overran or the
+        # consumer stopped early
+        stopped.set()
+        for scraper in scrapers:
+            scraper.deadline = time.monotonic()
+        executor.shutdown(wait=False)
+        
+        for scraper in scrapers:
+            if scraper.source_name not in results:
+                if overran:
+                    message = f"Did not finish within {timeout:g}s"
+                else:
+                    message = "Stopped before finishing"
+                logger.error(f"Scraper {scraper.source_name}: {message}")
+                results[scraper.source_name] = {
+                    'source': scraper.source_name,
+                    'count': 0,
+                    'status': 'error',
+                    'error_message': message,
+                    'metrics': scraper.pop_metrics(),
+                    'started_at': run_started_at,
+                    'completed_at': datetime.utcnow(),
+                    'duration': None
+                }
+
+def run_scrapers(timeout: float = DEFAULT_SOURCE_TIMEOUT,
+                 known_urls: Optional[Collection[str]] = None) -> Dict[str, Dict]:
+    """
+    Run all registered scrapers concurrently, each with its own time budget
+    
+    Pass the URLs already in the database as known_urls to scrape incrementally.
+    Prefer iter_scraped_agendas when the agendas can be processed as they arrive.
+    
+    Returns:
+        Dictionary mapping source name to its scrape_source() result
+    """
+    results = {}
+    agendas = {}
+    for agenda in iter_scraped_agendas(timeout, known_urls, results):
+        agendas.setdefault(agenda['source'], []).append(agenda)
+    
+    for source, result in results.items():
+        result['agendas'] = agendas.get(source, [])
     return results
+
+def scrape_all_sources(timeout: float = DEFAULT_SOURCE_TIMEOUT) -> Dict[str, List[Dict]]:
+    """Scrape all configured sources"""
+    return {source: result['agendas'] for source, result in run_scrapers(timeout).items()}
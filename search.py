@@ -0,0 +1,232 @@
+"""
+Full-text search over meeting titles, agenda text and AI summaries
+
+The search index lives in its own meeting_search table: an FTS5 virtual
+table on SQLite, and a tsvector column with a GIN index on PostgreSQL. Title
+matches rank above summary matches, which rank above agenda text matches.
+Ingest and summary code calls index_agendas() for the rows it writes, so the
+index stays current without rescanning; rebuild_search_index() recreates it
+from scratch (manage.py reindex-search).
+"""
+
+import re
+import html
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'meeting_search'
+SEARCH_LANGUAGE = 'english'  # PostgreSQL text search configuration
+
+# Relative weight of title, summary and agenda text matches (SQLite bm25)
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
+# PostgreSQL rejects tsvectors over 1MB; longer agenda text is cut off
+SEARCH_MAX_CONTENT_CHARS = 500000
+
+SNIPPET_WORDS = 24
+MAX_QUERY_TERMS = 8
+INDEX_BATCH_SIZE = 500
+
+# Stand-ins for <mark> tags, swapped in after the snippet text is escaped
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+# (title, summary, agenda text) weighted A, B, C for ts_rank_cd
+_PG_DOCUMENT = (
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(meeting_title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(ai_summary, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_LANGUAGE}', left(coalesce(agenda_content, ''), {SEARCH_MAX_CONTENT_CHARS})), 'C')"
+)
+
+def create_search_index(connection) -> bool:
+    """
+    Create the meeting_search table if it does not exist
+
+    Returns:
+        False if this database has no full-text search support
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        try:
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                "meeting_title, ai_summary, agenda_content, tokenize = 'porter unicode61')"
+            ))
+        except Exception as e:
+            logger.warning(f"Search disabled, SQLite was built without FTS5: {e}")
+            return False
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', :rank)"),
+            {'rank': f'bm25({weights})'}
+        )
+        return True
+
+    if dialect == 'postgresql':
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "agenda_id INTEGER PRIMARY KEY REFERENCES meeting_agendas (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)"
+        ))
+        return True
+
+    logger.warning(f"Search is not supported on {dialect}")
+    return False
+
+def search_available(connection=None) -> bool:
+    """Whether the meeting_search table exists"""
+    connection = connection or db.session.connection()
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        query = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name")
+    elif dialect == 'postgresql':
+        query = text("SELECT 1 FROM pg_tables WHERE schemaname = current_schema() AND tablename = :name")
+    else:
+        return False
+    return connection.execute(query, {'name': SEARCH_TABLE}).first() is not None
+
+def _index_statements(dialect: str, where: str) -> List:
+    """Statements that (re)index the meeting_agendas rows matching a WHERE clause"""
+    if dialect == 'sqlite':
+        return [
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN (SELECT id FROM meeting_agendas WHERE {where})"),
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, meeting_title, ai_summary, agenda_content) "
+                 f"SELECT id, meeting_title, ai_summary, agenda_content FROM meeting_agendas WHERE {where}")
+        ]
+    return [text(
+        f"INSERT INTO {SEARCH_TABLE} (agenda_id, document) SELECT id, {_PG_DOCUMENT} FROM meeting_agendas "
+        f"WHERE {where} ON CONFLICT (agenda_id) DO UPDATE SET document = EXCLUDED.document"
+    )]
+
+def index_agendas(agenda_ids: Iterable[int]) -> int:
+    """
+    Add or refresh the search entries of the given agendas
+
+    Pending ORM changes are flushed first, so agendas modified in the
+    current session are indexed with their new text. Does nothing if search
+    is not available. The caller is responsible for committing.
+
+    Returns:
+        Number of agendas indexed
+    """
+    agenda_ids = [agenda_id for agenda_id in agenda_ids if agenda_id is not None]
+    if not agenda_ids:
+        return 0
+
+    db.session.flush()
+    connection = db.session.connection()
+    if not search_available(connection):
+        return 0
+
+    statements = [
+        statement.bindparams(bindparam('ids', expanding=True))
+        for statement in _index_statements(connection.dialect.name, 'id IN :ids')
+    ]
+    for start in range(0, len(agenda_ids), INDEX_BATCH_SIZE):
+        for statement in statements:
+            connection.execute(statement, {'ids': agenda_ids[start:start + INDEX_BATCH_SIZE]})
+    return len(agenda_ids)
+
+def rebuild_search_index(connection) -> int:
+    """
+    Create the search index if needed and fill it from every stored agenda
+
+    Returns:
+        Number of agendas indexed
+    """
+    if not create_search_index(connection):
+        return 0
+
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    for statement in _index_statements(connection.dialect.name, '1 = 1'):
+        connection.execute(statement)
+    return connection.execute(text(f"SELECT count(*) FROM {SEARCH_TABLE}")).scalar()
+
+def search_terms(query: Optional[str]) -> List[str]:
+    """Words of a search query, lowercased; punctuation and operators are dropped"""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_QUERY_TERMS]
+
+def _fts5_query(terms: List[str]) -> str:
+    # Every word must match. The last one may also be the start of a word, so
+    # results keep up while someone is typing; prefixes are not stemmed, so
+    # the whole word is matched as well
+    phrases = [f'"{term}"' for term in terms[:-1]]
+    phrases.append(f'("{terms[-1]}" OR "{terms[-1]}"*)')
+    return ' AND '.join(phrases)
+
+def _tsquery(terms: List[str]) -> str:
+    return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+def _marked_html(value: Optional[str]) -> str:
+    """Escape snippet text, turning the match markers into <mark> tags"""
+    return html.escape(value or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+def search_meetings(query: str, limit: int = 20, offset: int = 0, source: Optional[str] = None) -> List[Dict]:
+    """
+    Meetings matching every word of a query, best matches first
+
+    Returns:
+        One dictionary per meeting with 'id', 'meeting_date', 'meeting_title',
+        'source', 'score' and HTML 'title_html' and 'snippet_html' in which
+        matches are wrapped in <mark> tags and everything else is escaped
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    source_filter = 'AND m.source = :source' if source else ''
+    params = {'limit': limit, 'offset': offset, 'source': source, 'start': MARK_START, 'end': MARK_END}
+
+    if db.session.connection().dialect.name == 'sqlite':
+        statement = text(
+            "SELECT m.id, m.meeting_date, m.meeting_title, m.source, "
+            f"highlight({SEARCH_TABLE}, 0, :start, :end) AS title_html, "
+            f"snippet({SEARCH_TABLE}, -1, :start, :end, '…', {SNIPPET_WORDS}) AS snippet_html, "
+            f"-{SEARCH_TABLE}.rank AS score "
+            f"FROM {SEARCH_TABLE} JOIN meeting_agendas m ON m.id = {SEARCH_TABLE}.rowid "
+            f"WHERE {SEARCH_TABLE} MATCH :query {source_filter} "
+            f"ORDER BY {SEARCH_TABLE}.rank LIMIT :limit OFFSET :offset"
+        )
+        params['query'] = _fts5_query(terms)
+    else:
+        # Rank and page on the index first, then build headlines for just that page
+        options = f"StartSel=' || :start || ', StopSel=' || :end || ', "
+        statement = text(
+            "SELECT m.id, m.meeting_date, m.meeting_title, m.source, "
+            f"ts_headline('{SEARCH_LANGUAGE}', m.meeting_title, hits.query, "
+            f"'{options}HighlightAll=true') AS title_html, "
+            f"ts_headline('{SEARCH_LANGUAGE}', concat_ws(' ', m.ai_summary, "
+            f"left(m.agenda_content, {SEARCH_MAX_CONTENT_CHARS})), hits.query, "
+            f"'{options}MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 3}, MaxFragments=2') AS snippet_html, "
+            "hits.score "
+            "FROM (SELECT s.agenda_id, q.query, ts_rank_cd(s.document, q.query) AS score "
+            f"FROM {SEARCH_TABLE} s JOIN meeting_agendas m ON m.id = s.agenda_id, "
+            f"to_tsquery('{SEARCH_LANGUAGE}', :query) AS q (query) "
+            f"WHERE s.document @@ q.query {source_filter} "
+            "ORDER BY score DESC, s.agenda_id DESC LIMIT :limit OFFSET :offset) AS hits "
+            "JOIN meeting_agendas m ON m.id = hits.agenda_id "
+            "ORDER BY hits.score DESC, m.id DESC"
+        )
+        params['query'] = _tsquery(terms)
+
+    results = []
+    for row in db.session.execute(statement.columns(meeting_date=db.Date), params).mappings():
+        results.append({
+            'id': row['id'],
+            'meeting_date': row['meeting_date'],
+            'meeting_title': row['meeting_title'],
+            'source': row['source'],
+            'score': float(row['score']),
+            'title_html': _marked_html(row['title_html']),
+            'snippet_html': _marked_html(row['snippet_html'])
+        })
+    return results
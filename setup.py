@@ -21,6 +21,8 @@ def setup_application():
         from models import db, MeetingAgenda
         from demo_data import get_demo_meetings
         from ai_service import AIService
+        from ingest import bulk_insert_agendas
+        from search import index_agendas
         from datetime import datetime
         
         # Create Flask app
@@ -30,7 +32,8 @@ def setup_application():
         with app.app_context():
             # Initialize database
             print("🗄️  Initializing database...")
-            db.create_all()
+            from migrations import migrate_database
+            migrate_database()
             print("   ✅ Database tables created")
             
             # Check if we already have data
@@ -41,23 +44,14 @@ def setup_application():
                 # Load demo data
                 print("📋 Loading demo meeting data...")
                 demo_meetings = get_demo_meetings()
-                added_count = 0
                 
-                for meeting_data in demo_meetings:
-                    agenda = MeetingAgenda(
-                        meeting_date=meeting_data['meeting_date'],
-                        meeting_title=meeting_data['meeting_title'],
-                        original_url=meeting_data['original_url'],
-                        agenda_content=meeting_data['agenda_content'],
-                        source=meeting_data['source']
-                    )
-                    
-                    db.session.add(agenda)
-                    added_count += 1
+                # Inserted like scraped agendas, so they are also added to the search index
+                new_meetings = bulk_insert_agendas(demo_meetings)
+                for meeting_data in new_meetings:
                     print(f"   📄 Added: {meeting_data['meeting_title'][:60]}...")
                 
                 db.session.commit()
-                print(f"   ✅ Loaded {added_count} demo meetings")
+                print(f"   ✅ Loaded {len(new_meetings)} demo meetings")
             
             # Generate AI summaries
             print("🤖 Generating AI summaries...")
@@ -85,7 +79,7 @@ def setup_application():
                         agenda.ai_summary = ai_result['summary']
                         agenda.ai_highlights = ai_result['highlights']
                         agenda.summary_generated_at = datetime.utcnow()
-                        agenda.is_processed = True
+                        agenda.is_processed = not ai_result.get('incomplete')  # Incomplete summaries are retried later
                         
                         processed_count += 1
                         print(f"      ✅ Summary generated")
@@ -94,6 +88,7 @@ def setup_application():
                         print(f"      ⚠️  Error: {e}")
                         continue
                 
+                index_agendas([agenda.id for agenda in unprocessed])
                 db.session.commit()
                 print(f"   ✅ Generated summaries for {processed_count} meetings")
             else:
@@ -166,6 +161,7 @@ def setup_database():
         from models import db, MeetingAgenda
         from demo_data import get_demo_meetings
         from ai_service import AIService
+        from search import rebuild_search_index
         from datetime import datetime
         
         app = create_simple_app()
@@ -212,7 +208,7 @@ def setup_database():
                     agenda.ai_summary = ai_result['summary']
                     agenda.ai_highlights = ai_result['highlights']
                     agenda.summary_generated_at = datetime.utcnow()
-                    agenda.is_processed = True
+                    agenda.is_processed = not ai_result.get('incomplete')  # Incomplete summaries are retried later
                     
                 except Exception as e:
                     print(f"  Warning: Could not generate AI summary for {meeting_data['meeting_title']}: {e}")
@@ -221,8 +217,11 @@ def setup_database():
                 db.session.add(agenda)
                 added_count += 1
             
+            # create_all doesn't build the search index; this creates and fills it
+            db.session.flush()
+            indexed = rebuild_search_index(db.session.connection())
             db.session.commit()
-            print(f"✓ Added {added_count} meetings to database")
+            print(f"✓ Added {added_count} meetings to database ({indexed} indexed for search)")
             
             return app
             
@@ -56,14 +56,29 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
-    // Search functionality (placeholder)
+    // Meeting search (full-text, see /api/search)
     const searchInput = document.querySelector('input[type="search"]');
-    if (searchInput) {
-        searchInput.addEventListener('input', debounce(function() {
-            const query = this.value.trim();
-            if (query.length > 2) {
-                console.log('Searching for:', query);
-                // In a real application, this would make an API call
+    const searchResults = document.getElementById('searchResults');
+    if (searchInput && searchResults) {
+        let latestQuery = '';
+        searchInput.addEventListener('input', debounce(async function() {
+            const query = searchInput.value.trim();
+            latestQuery = query;
+            if (query.length <= 2) {
+                searchResults.innerHTML = '';
+                return;
+            }
+            
+            try {
+                const data = await API.get(`/api/search?q=${encodeURIComponent(query)}&per_page=10`);
+                // Ignore responses that arrive after a newer search was started
+                if (query === latestQuery) {
+                    renderSearchResults(searchResults, data.results);
+                }
+            } catch (error) {
+                if (query === latestQuery) {
+                    searchResults.innerHTML = '<div class="list-group-item text-muted">Search is not available right now.</div>';
+                }
             }
         }, 300));
     }
@@ -109,6 +124,24 @@ function debounce(func, wait) {
     };
 }
 
+// Render search results; titles and snippets arrive HTML-escaped, with matches in <mark> tags
+function renderSearchResults(container, results) {
+    if (!results.length) {
+        container.innerHTML = '<div class="list-group-item text-muted">No meetings match your search.</div>';
+        return;
+    }
+    
+    container.innerHTML = results.map(result => `
+        <a href="${result.url}" class="list-group-item list-group-item-action">
+            <div class="d-flex justify-content-between">
+                <strong>${result.title_html}</strong>
+                <small class="text-muted ms-2">${result.meeting_date || ''}</small>
+            </div>
+            <small class="text-muted">${result.snippet_html}</small>
+        </a>
+    `).join('');
+}
+
 // Show notification function
 function showNotification(message, type = 'info') {
     // Create notification element
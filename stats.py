@@ -0,0 +1,96 @@
+"""
+Meeting counters for the admin dashboard and manage.py stats
+
+All counters come from one GROUP BY over meeting_agendas, so every source
+shows up without code changes. With STATS_MATERIALIZED=true the ingest and
+summary tasks also store the grouped counts in meeting_counters, and the
+dashboard reads those few rows instead of scanning the agendas table.
+"""
+
+import os
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, insert
+
+from models import db, MeetingAgenda, MeetingCounter
+
+logger = logging.getLogger(__name__)
+
+STATS_MATERIALIZED = os.getenv('STATS_MATERIALIZED', 'false').lower() == 'true'
+
+# Display names; other sources are shown by their name
+SOURCE_LABELS = {
+    'williamsburg': 'Williamsburg',
+    'jamescity': 'James City'
+}
+
+def source_label(source: str) -> str:
+    return SOURCE_LABELS.get(source, source.replace('_', ' ').title())
+
+def _grouped_counts() -> List[Tuple[str, bool, int]]:
+    """(source, is_processed, count) for every combination present"""
+    return db.session.query(
+        MeetingAgenda.source, MeetingAgenda.is_processed, func.count(MeetingAgenda.id)
+    ).group_by(MeetingAgenda.source, MeetingAgenda.is_processed).all()
+
+def _materialized_counts() -> List[Tuple[str, bool, int]]:
+    return db.session.query(MeetingCounter.source, MeetingCounter.is_processed, MeetingCounter.count).all()
+
+def meeting_counts(materialized: bool = STATS_MATERIALIZED) -> Dict:
+    """
+    Total and processed meeting counts, overall and per source
+
+    Reads meeting_counters when materialized and it has been filled,
+    otherwise runs the GROUP BY query.
+
+    Returns:
+        {'total_meetings', 'processed_meetings', 'sources': [{'source',
+        'label', 'total', 'processed'}, ...]} with sources sorted by name
+    """
+    rows = _materialized_counts() if materialized else []
+    if not rows:
+        rows = _grouped_counts()
+
+    sources = {}
+    for source, is_processed, count in rows:
+        entry = sources.setdefault(source, {'source': source, 'label': source_label(source), 'total': 0, 'processed': 0})
+        entry['total'] += count
+        if is_processed:
+            entry['processed'] += count
+
+    return {
+        'total_meetings': sum(entry['total'] for entry in sources.values()),
+        'processed_meetings': sum(entry['processed'] for entry in sources.values()),
+        'sources': [sources[source] for source in sorted(sources)]
+    }
+
+def refresh_meeting_counters() -> bool:
+    """
+    Recompute meeting_counters if STATS_MATERIALIZED is on
+
+    Call after committing new or newly summarized agendas. The caller is
+    responsible for committing.
+
+    Returns:
+        Whether the counters were refreshed
+    """
+    if not STATS_MATERIALIZED:
+        return False
+
+    # NULL is_processed (older rows) counts as unprocessed
+    counts = {}
+    for source, is_processed, count in _grouped_counts():
+        key = (source, bool(is_processed))
+        counts[key] = counts.get(key, 0) + count
+
+    now = datetime.utcnow()
+    rows = [
+        {'source': source, 'is_processed': is_processed, 'count': count, 'updated_at': now}
+        for (source, is_processed), count in counts.items()
+    ]
+    MeetingCounter.query.delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(MeetingCounter), rows)
+    return True
@@ -0,0 +1,157 @@
+"""
+Persistent cache for AI-generated agenda summaries
+
+Summaries are keyed by a hash of the normalized agenda text, title, date,
+model and prompt version, so re-running summarization over unchanged content
+never calls OpenAI twice.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_URL = os.getenv('SUMMARY_CACHE_URL', 'sqlite:///summary_cache.db')
+DEFAULT_TTL = int(os.getenv('SUMMARY_CACHE_TTL', str(30 * 24 * 3600)))  # 30 days
+DEFAULT_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '20000'))
+
+def normalize_content(content: str) -> str:
+    """Collapse whitespace so formatting-only changes hash the same"""
+    return re.sub(r'\s+', ' ', content or '').strip()
+
+def make_cache_key(content: str, title: str, date: str, model: str, prompt_version: str) -> str:
+    """Stable hash of everything that influences a generated summary"""
+    payload = json.dumps([normalize_content(content), title, date, model, prompt_version])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """
+    Summary cache backed by SQLite or Redis
+
+    The SQLite backend expires entries after ttl seconds and evicts the least
+    recently used ones beyond max_entries. The Redis backend sets a TTL on
+    each key and leaves size-based eviction to the server's maxmemory policy.
+    """
+
+    def __init__(self, url: str = DEFAULT_CACHE_URL, ttl: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.url = url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self._sets_since_evict = 0
+
+        self.redis = None
+        self.conn = None
+
+        if url.startswith(('redis://', 'rediss://')):
+            import redis
+            self.redis = redis.Redis.from_url(url)
+        else:
+            path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url
+            self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS summary_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS ix_summary_cache_accessed ON summary_cache (accessed_at)')
+            self.conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for a key, or None on a miss"""
+        try:
+            if self.redis is not None:
+                raw = self.redis.get(f"summary:{key}")
+            else:
+                now = time.time()
+                with self.lock:
+                    row = self.conn.execute(
+                        'SELECT value FROM summary_cache WHERE key = ? AND created_at >= ?',
+                        (key, now - self.ttl)
+                    ).fetchone()
+                    if row:
+                        self.conn.execute('UPDATE summary_cache SET accessed_at = ? WHERE key = ?', (now, key))
+                        self.conn.commit()
+                raw = row[0] if row else None
+        except Exception as e:
+            logger.warning(f"Summary cache lookup failed: {e}")
+            raw = None
+
+        with self.lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value for a key"""
+        raw = json.dumps(value)
+        try:
+            if self.redis is not None:
+                self.redis.set(f"summary:{key}", raw, ex=self.ttl)
+                return
+
+            now = time.time()
+            with self.lock:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO summary_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, raw, now, now)
+                )
+                self._sets_since_evict += 1
+                if self._sets_since_evict >= 100:
+                    self._evict(now)
+                self.conn.commit()
+        except Exception as e:
+            logger.warning(f"Summary cache write failed: {e}")
+
+    def _evict(self, now: float):
+        """Drop expired entries and the least recently used ones over max_entries"""
+        self._sets_since_evict = 0
+        self.conn.execute('DELETE FROM summary_cache WHERE created_at < ?', (now - self.ttl,))
+        self.conn.execute(
+            'DELETE FROM summary_cache WHERE key IN ('
+            'SELECT key FROM summary_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+_default_cache: Optional[SummaryCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_summary_cache() -> Optional[SummaryCache]:
+    """Process-wide summary cache, or None if disabled or unavailable"""
+    global _default_cache
+
+    if DEFAULT_CACHE_URL.lower() in ('', 'none', 'off'):
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = SummaryCache()
+            except Exception as e:
+                logger.warning(f"Summary cache disabled, could not open {DEFAULT_CACHE_URL}: {e}")
+                return None
+        return _default_cache
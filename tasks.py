@@ -2,9 +2,10 @@
 Background tasks for scraping and processing meeting agendas
 """
 
-from celery import Celery
+from celery import Celery, group
 import os
-from datetime import datetime
+import time
+from datetime import datetime, date, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,16 +38,172 @@ celery.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    task_routes={
+        'tasks.summarize_agendas': {'queue': os.getenv('SUMMARY_QUEUE', 'celery')},
+        'tasks.backfill_unit': {'queue': os.getenv('BACKFILL_QUEUE', 'celery')},
+    },
 )
 
-@celery.task(bind=True)
-def scrape_and_process_agendas(self):
+# Summarization fan-out settings
+SUMMARY_BATCH_SIZE = int(os.getenv('SUMMARY_BATCH_SIZE', '5'))
+SUMMARY_RATE_LIMIT = os.getenv('SUMMARY_RATE_LIMIT') or None  # e.g. '20/m' per worker
+
+# Historical backfill retry settings
+BACKFILL_MAX_RETRIES = int(os.getenv('BACKFILL_MAX_RETRIES', '5'))
+BACKFILL_RETRY_DELAY = int(os.getenv('BACKFILL_RETRY_DELAY', '60'))  # seconds
+
+def log_source_result(result, items_scraped):
+    """Record a ScrapingLog row for one source's scrape result"""
+    from models import db, ScrapingLog
+    
+    log = ScrapingLog(
+        source=result['source'],
+        status=result['status'],
+        items_scraped=items_scraped,
+        error_message=result['error_message'],
+        started_at=result['started_at'],
+        completed_at=result['completed_at']
+    )
+    db.session.add(log)
+    return log
+
+def store_summary(agenda, ai_result):
+    """
+    Store an AIService result on an agenda
+    
+    An incomplete result (a long agenda whose chunks could not all be
+    summarized) leaves the agenda unprocessed so it is summarized again; its
+    basic summary is only stored if the agenda has no summary yet.
+    
+    Returns:
+        True if the agenda is now processed
+    """
+    complete = not ai_result.get('incomplete')
+    if complete or not agenda.ai_summary:
+        agenda.ai_summary = ai_result['summary']
+        agenda.ai_highlights = ai_result['highlights']
+        agenda.summary_generated_at = datetime.utcnow()
+    agenda.is_processed = complete
+    return complete
+
+def summarize_agenda(ai_service, agenda, metrics=None):
+    """
+    Generate and store the AI summary for one agenda, and re-index it for search
+    
+    If a metrics list is given, the time spent generating the summary is
+    appended to it (see metrics.save_fetch_metrics).
+    
+    Returns:
+        True if a summary was stored, False if the content was too short or
+        the summary is incomplete
+    """
+    from search import index_agendas
+    
+    if not agenda.agenda_content or len(agenda.agenda_content.strip()) < 50:
+        return False
+    
+    started = time.perf_counter()
+    ai_result = ai_service.generate_summary(
+        agenda.agenda_content,
+        agenda.meeting_title,
+        str(agenda.meeting_date)
+    )
+    if metrics is not None:
+        metrics.append({
+            'source': agenda.source,
+            'kind': 'summary',
+            'url': agenda.original_url,
+            'bytes': len(agenda.agenda_content),
+            'total_ms': (time.perf_counter() - started) * 1000,
+            'fetched_at': datetime.utcnow()
+        })
+    
+    processed = store_summary(agenda, ai_result)
+    index_agendas([agenda.id])
+    return processed
+
+def dispatch_summaries(agenda_ids, batch_size=None):
     """
-    Background task to scrape meeting agendas and generate AI summaries
+    Queue summarize_agendas tasks for the given agendas as a Celery group
+    
+    Agendas are split into batches of SUMMARY_BATCH_SIZE, one task per batch.
+    If the broker is unreachable the agendas stay unprocessed and are picked
+    up later by generate_missing_summaries.
+    """
+    batch_size = batch_size or SUMMARY_BATCH_SIZE
+    agenda_ids = list(agenda_ids)
+    if not agenda_ids:
+        return None
+    
+    batches = [agenda_ids[i:i + batch_size] for i in range(0, len(agenda_ids), batch_size)]
+    try:
+        result = group(summarize_agendas.s(batch) for batch in batches).apply_async()
+        logger.info(f"Queued {len(agenda_ids)} agendas for summarization in {len(batches)} tasks")
+        return result
+    except Exception as e:
+        logger.error(f"Could not queue summarization tasks: {e}")
+        return None
+
+@celery.task(bind=True, rate_limit=SUMMARY_RATE_LIMIT)
+def summarize_agendas(self, agenda_ids):
+    """
+    Background task to generate AI summaries for a small batch of agendas
     """
-    from scrapers import scrape_all_sources
     from ai_service import AIService
+    from models import db, MeetingAgenda
+    from metrics import save_fetch_metrics
+    from response_cache import bump_data_version
+    from stats import refresh_meeting_counters
+    
+    agendas = MeetingAgenda.query.filter(
+        MeetingAgenda.id.in_(agenda_ids),
+        MeetingAgenda.is_processed == False
+    ).all()
+    
+    ai_service = AIService()
+    processed_count = 0
+    metrics = []
+    
+    for agenda in agendas:
+        try:
+            if summarize_agenda(ai_service, agenda, metrics):
+                processed_count += 1
+                # Commit per agenda so each summary shows up as soon as it is ready
+                db.session.commit()
+                bump_data_version()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error generating AI summary for agenda {agenda.id}: {e}")
+            continue
+    
+    save_fetch_metrics(metrics)
+    if processed_count:
+        refresh_meeting_counters()
+    db.session.commit()
+    
+    if ai_service.cache:
+        logger.info(f"Summary cache stats: {ai_service.cache.stats()}")
+    return f"Generated summaries for {processed_count} agendas"
+
+@celery.task(bind=True)
+def scrape_and_process_agendas(self, incremental=True, refresh_days=None):
+    """
+    Background task to scrape meeting agendas and queue AI summaries
+    
+    Agendas are streamed from the scrapers and committed in small batches as
+    they arrive, and each batch's summaries are queued right away as
+    summarize_agendas tasks. With incremental=True, stored agendas for
+    meetings more than refresh_days (default AGENDA_REFRESH_DAYS) ago are not
+    re-fetched. Re-fetched agendas whose content fingerprint changed are
+    updated and summarized again as a whole; for agendas longer than one
+    chunk, the summary cache serves the chunks that did not change.
+    """
+    from scrapers import iter_scraped_agendas
     from models import db, MeetingAgenda, ScrapingLog
+    from ingest import refresh_agenda_stream, REFRESH_DAYS
+    from metrics import save_fetch_metrics
+    from response_cache import bump_data_version
+    from stats import refresh_meeting_counters
     
     try:
         # Log start of scraping
@@ -58,61 +215,32 @@ def scrape_and_process_agendas(self):
         db.session.add(log)
         db.session.commit()
         
-        # Scrape all sources
-        results = scrape_all_sources()
-        total_scraped = 0
+        # Scrape all sources concurrently, writing raw agendas in bulk as
+        # they arrive and skipping URLs we already have
+        refresh_days = REFRESH_DAYS if refresh_days is None else refresh_days
+        known_urls = MeetingAgenda.known_urls(before=date.today() - timedelta(days=refresh_days)) if incremental else None
+        results = {}
+        added = {}
+        updated = 0
         
-        # Initialize AI service
-        ai_service = AIService()
-        
-        for source, agendas in results.items():
-            for agenda_data in agendas:
-                try:
-                    # Check if this agenda already exists
-                    existing = MeetingAgenda.query.filter_by(
-                        original_url=agenda_data['original_url']
-                    ).first()
-                    
-                    if existing:
-                        logger.info(f"Agenda already exists: {agenda_data['meeting_title']}")
-                        continue
-                    
-                    # Create new agenda record
-                    agenda = MeetingAgenda(
-                        meeting_date=agenda_data['meeting_date'],
-                        meeting_title=agenda_data['meeting_title'],
-                        original_url=agenda_data['original_url'],
-                        agenda_content=agenda_data['agenda_content'],
-                        source=agenda_data['source']
-                    )
-                    
-                    # Generate AI summary if content is available
-                    if agenda_data['agenda_content'] and len(agenda_data['agenda_content'].strip()) > 50:
-                        try:
-                            ai_result = ai_service.generate_summary(
-                                agenda_data['agenda_content'],
-                                agenda_data['meeting_title'],
-                                str(agenda_data['meeting_date'])
-                            )
-                            
-                            agenda.ai_summary = ai_result['summary']
-                            agenda.ai_highlights = ai_result['highlights']
-                            agenda.summary_generated_at = datetime.utcnow()
-                            agenda.is_processed = True
-                            
-                        except Exception as e:
-                            logger.error(f"Error generating AI summary for {agenda_data['meeting_title']}: {e}")
-                            agenda.is_processed = False
-                    
-                    db.session.add(agenda)
-                    total_scraped += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing agenda {agenda_data.get('meeting_title', 'Unknown')}: {e}")
-                    continue
+        for new_agendas, changed_agendas in refresh_agenda_stream(iter_scraped_agendas(known_urls=known_urls, results=results)):
+            db.session.commit()
+            if new_agendas or changed_agendas:
+                bump_data_version()
+            for agenda_data in new_agendas:
+                added[agenda_data['source']] = added.get(agenda_data['source'], 0) + 1
+            updated += len(changed_agendas)
+            
+            # Summaries are generated by separate tasks so slow AI calls never
+            # hold up ingest or keep this transaction open
+            dispatch_summaries([agenda_data['id'] for agenda_data in new_agendas + changed_agendas])
         
-        # Commit all changes
+        for source, result in results.items():
+            source_log = log_source_result(result, added.get(source, 0))
+            save_fetch_metrics(result['metrics'], source_log)
+        refresh_meeting_counters()
         db.session.commit()
+        total_scraped = sum(added.values())
         
         # Update log
         log.status = 'success'
@@ -120,8 +248,8 @@ def scrape_and_process_agendas(self):
         log.completed_at = datetime.utcnow()
         db.session.commit()
         
-        logger.info(f"Successfully scraped and processed {total_scraped} agendas")
-        return f"Scraped {total_scraped} agendas"
+        logger.info(f"Successfully scraped and processed {total_scraped} agendas, updated {updated} changed agendas")
+        return f"Scraped {total_scraped} agendas, updated {updated}"
         
     except Exception as e:
         logger.error(f"Error in scraping task: {e}")
@@ -144,13 +272,12 @@ def generate_missing_summaries(self):
     """
     from ai_service import AIService
     from models import db, MeetingAgenda
+    from response_cache import bump_data_version
+    from stats import refresh_meeting_counters
     
     try:
         # Find agendas without AI summaries
-        unprocessed_agendas = MeetingAgenda.query.filter(
-            MeetingAgenda.is_processed == False,
-            MeetingAgenda.agenda_content.isnot(None)
-        ).limit(10).all()  # Process 10 at a time
+        unprocessed_agendas = MeetingAgenda.unprocessed().limit(10).all()  # Process 10 at a time
         
         if not unprocessed_agendas:
             return "No agendas need processing"
@@ -160,30 +287,136 @@ def generate_missing_summaries(self):
         
         for agenda in unprocessed_agendas:
             try:
-                if len(agenda.agenda_content.strip()) < 50:
-                    continue
-                
-                ai_result = ai_service.generate_summary(
-                    agenda.agenda_content,
-                    agenda.meeting_title,
-                    str(agenda.meeting_date)
-                )
-                
-                agenda.ai_summary = ai_result['summary']
-                agenda.ai_highlights = ai_result['highlights']
-                agenda.summary_generated_at = datetime.utcnow()
-                agenda.is_processed = True
-                
-                processed_count += 1
+                if summarize_agenda(ai_service, agenda):
+                    processed_count += 1
                 
             except Exception as e:
                 logger.error(f"Error generating summary for agenda {agenda.id}: {e}")
                 continue
         
+        if processed_count:
+            refresh_meeting_counters()
         db.session.commit()
+        if processed_count:
+            bump_data_version()
+        if ai_service.cache:
+            logger.info(f"Summary cache stats: {ai_service.cache.stats()}")
         logger.info(f"Generated summaries for {processed_count} agendas")
         return f"Generated summaries for {processed_count} agendas"
         
     except Exception as e:
         logger.error(f"Error in summary generation task: {e}")
         raise
+
+def plan_backfill(since, sources=None):
+    """
+    Create a checkpoint for every backfill unit of every source
+    
+    Existing checkpoints for the same since date are reused, so an
+    interrupted backfill picks up where it stopped.
+    
+    Returns:
+        The checkpoints that are not done yet
+    """
+    from scrapers import get_scrapers
+    from models import db, BackfillCheckpoint
+    
+    checkpoints = []
+    for scraper in get_scrapers():
+        if sources and scraper.source_name not in sources:
+            continue
+        
+        for unit in scraper.backfill_units():
+            checkpoint = BackfillCheckpoint.query.filter_by(
+                source=scraper.source_name, unit=unit, since=since
+            ).first()
+            if checkpoint is None:
+                checkpoint = BackfillCheckpoint(source=scraper.source_name, unit=unit, since=since)
+                db.session.add(checkpoint)
+            checkpoints.append(checkpoint)
+    
+    db.session.commit()
+    return [checkpoint for checkpoint in checkpoints if checkpoint.status != 'done']
+
+def run_backfill_unit(checkpoint_id, queue_summaries=True):
+    """
+    Backfill one unit, resuming after its checkpoint's cursor
+    
+    Each page of agendas is inserted and committed together with the new
+    cursor, so a crash loses at most the page in progress.
+    
+    Returns:
+        Number of new agendas added
+    """
+    from scrapers import get_scraper
+    from models import db, MeetingAgenda, BackfillCheckpoint
+    from ingest import bulk_insert_agendas
+    from metrics import save_fetch_metrics
+    from response_cache import bump_data_version
+    from stats import refresh_meeting_counters
+    
+    checkpoint = db.session.get(BackfillCheckpoint, checkpoint_id)
+    if checkpoint is None or checkpoint.status == 'done':
+        return 0
+    
+    scraper = get_scraper(checkpoint.source)
+    scraper.known_urls = MeetingAgenda.known_urls()
+    
+    checkpoint.status = 'running'
+    checkpoint.error_message = None
+    checkpoint.started_at = checkpoint.started_at or datetime.utcnow()
+    db.session.commit()
+    
+    added = 0
+    try:
+        for cursor, agendas in scraper.iter_backfill_pages(checkpoint.unit, checkpoint.since, checkpoint.cursor):
+            new_agendas = bulk_insert_agendas(agendas)
+            save_fetch_metrics(scraper.pop_metrics())
+            checkpoint.cursor = cursor
+            checkpoint.items_scraped = (checkpoint.items_scraped or 0) + len(new_agendas)
+            db.session.commit()
+            if new_agendas:
+                bump_data_version()
+            
+            added += len(new_agendas)
+            logger.info(f"Backfill {checkpoint.source} {checkpoint.unit}: page {cursor}, {len(new_agendas)} new agendas")
+            if queue_summaries:
+                dispatch_summaries([agenda_data['id'] for agenda_data in new_agendas])
+    except Exception as e:
+        db.session.rollback()
+        checkpoint.status = 'error'
+        checkpoint.error_message = str(e)
+        db.session.commit()
+        raise
+    
+    checkpoint.status = 'done'
+    checkpoint.completed_at = datetime.utcnow()
+    if added:
+        refresh_meeting_counters()
+    db.session.commit()
+    return added
+
+def dispatch_backfill(checkpoint_ids):
+    """Queue one backfill_unit task per checkpoint as a Celery group"""
+    checkpoint_ids = list(checkpoint_ids)
+    if not checkpoint_ids:
+        return None
+    
+    result = group(backfill_unit.s(checkpoint_id) for checkpoint_id in checkpoint_ids).apply_async()
+    logger.info(f"Queued {len(checkpoint_ids)} backfill tasks")
+    return result
+
+@celery.task(bind=True, max_retries=BACKFILL_MAX_RETRIES)
+def backfill_unit(self, checkpoint_id):
+    """
+    Background task to backfill one unit (e.g. one meeting type)
+    
+    Failures are retried; every attempt resumes from the saved checkpoint.
+    """
+    try:
+        added = run_backfill_unit(checkpoint_id)
+    except Exception as e:
+        logger.error(f"Error in backfill task for checkpoint {checkpoint_id}: {e}")
+        raise self.retry(exc=e, countdown=BACKFILL_RETRY_DELAY)
+    
+    return f"Backfilled {added} agendas"
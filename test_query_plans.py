@@ -0,0 +1,52 @@
+"""
+Query plan checks (see query_plans.py) as a test, on a synthetic SQLite table
+
+Same checks and table size as manage.py check-query-plans, so a route or
+query that stops using the index meant for it fails the test suite. The
+planner's choices on a small table say little about a large one, so the
+full 100,000 rows are loaded (about ten seconds).
+"""
+
+import pytest
+
+import response_cache
+from app import create_app
+from migrations import migrate_database
+from models import db, MeetingAgenda
+from query_plans import load_synthetic_agendas, route_checks, check_plans
+
+SYNTHETIC_ROWS = 100000
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    database = tmp_path_factory.mktemp('query_plans') / 'query_plans.db'
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # Pages rendered from synthetic data must not reach the shared response cache
+        monkeypatch.setattr(response_cache, 'RESPONSE_CACHE_URL', 'none')
+        monkeypatch.setenv('DATABASE_URL', f'sqlite:///{database}')
+        app = create_app()
+        with app.app_context():
+            migrate_database()
+            load_synthetic_agendas(SYNTHETIC_ROWS)
+            db.session.commit()
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+
+def _problems(results):
+    return {result['check']: result['problems'] for result in results if result['problems']}
+
+def test_every_route_uses_its_index(app):
+    assert _problems(check_plans(route_checks(app))) == {}
+
+def test_missing_index_is_reported(app):
+    index = next(index for index in MeetingAgenda.__table__.indexes
+                 if index.name == 'ix_meeting_agendas_source_date_id')
+    index.drop(db.engine)
+    try:
+        problems = _problems(check_plans(route_checks(app)))
+    finally:
+        index.create(db.engine)
+
+    assert 'Meetings by source' in problems
+    assert 'Meetings, first page' not in problems